@@ -1,20 +1,60 @@
 #!/usr/bin/env python3
 """
-This module contains functions for the ``create_folders.nf``
-and ``run_docker.nf`` workflows. It provides the following functionality:
-- Create a folder in Synapse
-- Update a folder in Synapse with File entities
-- Modifies a File entity's filehandle name by prefixing it with a given string
+This module contains functions for the ``create_folders.nf`` workflow.
+It provides the following functionality:
+- Create a folder in Synapse, or reuse it if it already exists
+- Update the permissions (local share settings) of a folder in Synapse
+
+Uploading output files into the folders is handled by ``update_folders.py``.
 """
 
+import argparse
 import sys
-from typing import List, Union
+import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
 
 import synapseclient
+from synapseclient.core.utils import id_of
 
 import helpers
 
 
+def get_args() -> argparse.Namespace:
+    """Set up command-line interface and get arguments."""
+    parser = argparse.ArgumentParser(
+        description="Create the Challenge output folders of one or more submissions."
+    )
+    parser.add_argument("project_name", type=str, help="The name of the Project")
+    parser.add_argument(
+        "submission_id",
+        type=str,
+        nargs="?",
+        help="The ID of the submission. Not needed if --manifest is given.",
+    )
+    parser.add_argument(
+        "--private-folders",
+        type=str,
+        default="predictions",
+        help="Comma-separated subfolders that should only be available to Challenge admins",
+    )
+    parser.add_argument(
+        "--manifest",
+        type=str,
+        help="A TSV file with a ''submission_id'' column, to create the folders of many submissions at once",
+    )
+    args = parser.parse_args()
+    if bool(args.submission_id) == bool(args.manifest):
+        parser.error("Exactly one of submission_id or --manifest must be given")
+
+    return args
+
+
+class FolderLookup(NamedTuple):
+    folder_id: str
+    created: bool
+
+
 def create_folder(
     syn: synapseclient.Synapse,
     folder_name: str,
@@ -41,48 +81,182 @@ def create_folder(
     return subfolder
 
 
+def get_or_create_folder(
+    syn: synapseclient.Synapse,
+    folder_name: str,
+    parent: str,
+) -> FolderLookup:
+    """
+    Retrieves the Folder entity with the given name under the designated ``parent``,
+    and only creates it if it does not exist yet. Looking up an existing Folder takes a
+    single request, while storing it again takes several (a rejected create, a lookup,
+    a read and an update).
+
+    Arguments:
+        syn: A Synapse Python client instance
+        folder_name: The name of the subfolder to be retrieved or created
+        parent: A synapse Id of the parent folder or project under which the folder lives
+
+    Returns:
+        folder_id: The synapse Id of the Folder entity
+        created: Whether the Folder entity was just created
+
+    """
+    # Not using the cached lookup here, since the folder may be created in the meantime
+    folder_id = syn.findEntityId(folder_name, parent)
+    if folder_id:
+        return FolderLookup(folder_id=folder_id, created=False)
+
+    folder_id = create_folder(syn, folder_name=folder_name, parent=parent).id
+
+    return FolderLookup(folder_id=folder_id, created=True)
+
+
+def canonical_resource_access(
+    resource_access: List[Dict[str, Any]]
+) -> List[Tuple[int, Tuple[str, ...]]]:
+    """
+    Puts the resource access list of an ACL into a canonical form, so that two lists granting
+    the same access compare equal regardless of the order of their entries and access types.
+
+    Arguments:
+        resource_access: The ''resourceAccess'' list of an ACL
+
+    Returns:
+        The sorted (principalId, access types) pairs of the list
+    """
+    return sorted(
+        (int(entry["principalId"]), tuple(sorted(entry["accessType"])))
+        for entry in resource_access
+    )
+
+
 def update_permissions(
     syn: synapseclient.Synapse,
     subfolder: Union[str, synapseclient.Entity],
-    project_id: str,
+    participant_team_id: str,
     principal_id: str,
-    access_type: List[str] = [],
-) -> None:
+    access_type: Tuple[str, ...] = (),
+    inherited_acl: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
     """
     Updates the permissions (local share settings) of the given Folder/File to change access for the given principalId.
     By default it will always revoke all access types for all challenge participants and the public.
+    All changes are written to the Folder/File ACL in a single request.
 
     Arguments:
         syn: A Synapse Python client instance
         subfolder: The Folder whose permissions will be updated
-        project_id: The Project Synapse ID
+        participant_team_id: The ID of the Team of all Challenge participants
         principal_id: The synapse ID to change permissions for
         access_type: Type of permission to be granted
+        inherited_acl: The ACL of the parent that the Folder/File currently inherits its permissions from,
+                       if it is already known. Only to be given for a Folder/File without local share settings.
+
+    Returns:
+        The ACL stored for the Folder/File
     """
 
+    entity_id = id_of(subfolder)
+
     # New ACL has all access types revoked for everyone except Project maintainers by default
-    all_participants = syn.restGET(f"/entity/{project_id}/challenge").get(
-        "participantTeamId"
-    )
     registered_users = synapseclient.AUTHENTICATED_USERS
     public = synapseclient.PUBLIC
 
-    for id in [all_participants, registered_users, public]:
-        syn.setPermissions(subfolder, principalId=id, accessType=[])
+    # The designated principalId is also dropped here, and re-added below if it is granted access
+    revoked_ids = {int(id) for id in [participant_team_id, registered_users, public]}
+    if principal_id:
+        revoked_ids.add(int(principal_id))
+
+    # Start from the ACL currently in effect for the entity, which belongs to its benefactor
+    # (the entity itself if it already has local share settings, otherwise a parent)
+    if inherited_acl is None:
+        benefactor_id = syn.restGET(f"/entity/{entity_id}/benefactor").get("id")
+        acl = syn.restGET(f"/entity/{benefactor_id}/acl")
+    else:
+        benefactor_id = inherited_acl["id"]
+        acl = dict(inherited_acl)
+    current_resource_access = acl["resourceAccess"]
+    acl["resourceAccess"] = [
+        resource_access
+        for resource_access in current_resource_access
+        if int(resource_access["principalId"]) not in revoked_ids
+    ]
 
     # Also update the access type for the designated principalId if there is one
-    if principal_id:
-        syn.setPermissions(subfolder, principalId=principal_id, accessType=access_type)
+    if principal_id and access_type:
+        acl["resourceAccess"].append(
+            {"principalId": int(principal_id), "accessType": list(access_type)}
+        )
+
+    # Store every change in a single request: update the local ACL if there is one,
+    # otherwise create it so the entity stops inheriting from its benefactor
+    if benefactor_id == entity_id:
+        # Nothing to write if the local ACL already grants exactly the desired access,
+        # e.g. when the workflow is re-run for a submission
+        if canonical_resource_access(acl["resourceAccess"]) == canonical_resource_access(
+            current_resource_access
+        ):
+            print(f"Permissions of {entity_id} are already up to date")
+            return acl
+        return syn.restPUT(f"/entity/{entity_id}/acl", body=json.dumps(acl, separators=(",", ":")))
+
+    acl["id"] = entity_id
+    return syn.restPOST(f"/entity/{entity_id}/acl", body=json.dumps(acl, separators=(",", ":")))
+
+
+def create_level2_subfolder(
+    syn: synapseclient.Synapse,
+    folder_name: str,
+    parent: str,
+    participant_team_id: str,
+    submitter_id: str,
+    private_folders: Tuple[str, ...],
+    parent_acl: Dict[str, Any],
+) -> str:
+    """
+    Creates a level 2 subfolder under the submitter's (level 1) subfolder, and
+    restricts its access to Project maintainers if it is one of the ``private_folders``.
+
+    Arguments:
+        syn: A Synapse Python client instance
+        folder_name: The name of the level 2 subfolder to be created
+        parent: A synapse Id of the level 1 subfolder
+        participant_team_id: The ID of the Team of all Challenge participants
+        submitter_id: The ID of the submitter
+        private_folders: The names of the subfolders only accessible to Project maintainers
+        parent_acl: The ACL of the level 1 subfolder
+
+    Returns:
+        The synapse Id of the level 2 subfolder
+
+    """
+    level2_subfolder = get_or_create_folder(syn, folder_name=folder_name, parent=parent)
+    # The level 2 subfolders will inherit the permissions set on the level 1 subfolder.
+    # The subfolder denoted under ``private_folders`` will have its own ACL, and will be only accessed by
+    # Project maintainers. A newly created subfolder inherits the level 1 ACL we already have,
+    # so its own ACL is derived from it without looking anything up.
+    if folder_name in private_folders:
+        update_permissions(
+            syn,
+            subfolder=level2_subfolder.folder_id,
+            participant_team_id=participant_team_id,
+            principal_id=submitter_id,
+            access_type=(),
+            inherited_acl=parent_acl if level2_subfolder.created else None,
+        )
+
+    return level2_subfolder.folder_id
 
 
 def create_folders(
     project_name: str,
     submission_id: str,
     syn: Union[None, synapseclient.Synapse] = None,
-    subfolders: List[str] = ["docker_logs", "predictions"],
-    private_folders: List[str] = ["predictions"],
+    subfolders: Tuple[str, ...] = ("docker_logs", "predictions"),
+    private_folders: Tuple[str, ...] = ("predictions",),
     root_folder_name: str = "Logs",
-) -> None:
+) -> Dict[str, str]:
     """
     This function can either create or re-create a root folder and set of subfolders to
     store Challenge output files for Challenge participants and organizers.
@@ -97,67 +271,106 @@ def create_folders(
     Arguments:
         project_name: The name of the Project
         submission_id: The Submission ID of the submission being processed
-        create_or_update: Determines whether the Folder structure will be built
-                         from scratch, or updated with new output files. Value
-                         can either be ''create'' or ''update''.
-        predictions_file: The name of the predictions file that the predictions folder
-                          should be updated with.
-        log_file: The name of the log file that the docker_logs folder should be
-                  updated with.
+        syn: A Synapse Python client instance. If not given, the shared logged in client is used.
         subfolders: The subfolders to be created under the parent folder.
         private_folders: The name of the subfolder that will have local share settings
                      differing from the other subfolders.
         root_folder_name: The name of the root folder under the Project. Default is ''Logs''.
 
+    Returns:
+        The Synapse IDs of the submitter folder (keyed by ''submitter'') and of its subfolders
+        (keyed by their names). They are also written to a JSON file for ``update_folders.py``.
+
     """
+    # Private folders that aren't created are ignored, but point them out in case of a typo
+    unknown_private_folders = set(private_folders) - set(subfolders)
+    if unknown_private_folders:
+        print(
+            f"Warning: Private folders {sorted(unknown_private_folders)} are not among the subfolders to be created: {list(subfolders)}. They will be ignored."
+        )
+
     # Establish access to the Synapse API
     if not syn:
-        syn = synapseclient.login()
+        syn = helpers.get_syn()
 
     # Retrieving Synapse IDs that will be necessary later
-    project_id = syn.findEntityId(name=project_name)
+    project_id = helpers.find_entity_id(syn, name=project_name)
     submitter_id = helpers.get_participant_id(syn, submission_id)[0]
+    participant_team_id = syn.restGET(f"/entity/{project_id}/challenge").get(
+        "participantTeamId"
+    )
 
     # Create the Root-Folder/ directly under Project
-    root_folder = create_folder(syn, folder_name=root_folder_name, parent=project_id)
+    root_folder = get_or_create_folder(
+        syn, folder_name=root_folder_name, parent=project_id
+    ).folder_id
 
     # Creating the level 1 (directly under Root-Folder/) subfolder,
     # which is named after the submitters' team/userIds.
-    level1_subfolder = create_folder(syn, folder_name=submitter_id, parent=root_folder)
-    update_permissions(
+    level1_subfolder = get_or_create_folder(
+        syn, folder_name=submitter_id, parent=root_folder
+    ).folder_id
+    level1_acl = update_permissions(
         syn,
         subfolder=level1_subfolder,
-        project_id=project_id,
+        participant_team_id=participant_team_id,
         principal_id=submitter_id,
-        access_type=["READ", "DOWNLOAD"],
+        access_type=("READ", "DOWNLOAD"),
     )
     # Creating the level 2 subfolders that live directly under submitter subfolder.
-    for level2_subfolder in subfolders:
-        level2_subfolder = create_folder(
-            syn, folder_name=level2_subfolder, parent=level1_subfolder
-        )
-        # The level 2 subfolders will inherit the permissions set on the level 1 subfolder above.
-        # The subfolder denoted under ``private_folders`` will have its own ACL, and will be only accessed by
-        # Project maintainers:
-        if level2_subfolder.name in private_folders:
-            update_permissions(
+    # Each subfolder only depends on the level 1 subfolder, so they are created concurrently.
+    with ThreadPoolExecutor(max_workers=len(subfolders)) as executor:
+        futures = {
+            executor.submit(
+                create_level2_subfolder,
                 syn,
-                subfolder=level2_subfolder,
-                project_id=project_id,
-                principal_id=submitter_id,
-                access_type=[],
-            )
+                folder_name=level2_subfolder,
+                parent=level1_subfolder,
+                participant_team_id=participant_team_id,
+                submitter_id=submitter_id,
+                private_folders=private_folders,
+                parent_acl=level1_acl,
+            ): level2_subfolder
+            for level2_subfolder in subfolders
+        }
+        # Re-raise any error that occurred while creating a subfolder
+        folder_ids = {"submitter": level1_subfolder}
+        for future in as_completed(futures):
+            folder_ids[futures[future]] = future.result()
+
+    # Record the folder IDs, so the folders don't have to be looked up again when they are updated
+    folder_ids_filename = helpers.FOLDER_IDS_FILENAME.format(submission_id=submission_id)
+    helpers.write_json(folder_ids_filename, folder_ids)
+
+    return folder_ids
 
 
 if __name__ == "__main__":
-    # Assigning variables to the command line args
-    project_name = sys.argv[1]
-    submission_id = sys.argv[2]
-    private_folders = sys.argv[3]
+    args = get_args()
 
-    # Remove whitespace (if any) and split by comma to get a list
-    # of folders that should only be available to Challenge admins
-    private_folders = private_folders.strip().split(",")
+    # Remove whitespace (if any) and split by comma to get the
+    # folders that should only be available to Challenge admins
+    private_folders = tuple(args.private_folders.strip().split(","))
 
-    # Create the folders
-    create_folders(project_name=project_name, submission_id=submission_id, private_folders=private_folders)
+    if args.manifest:
+        submission_ids = [
+            row["submission_id"]
+            for row in helpers.read_manifest(args.manifest, ["submission_id"])
+        ]
+    else:
+        submission_ids = [args.submission_id]
+
+    # Create the folders, reusing the same Synapse session for every submission. They are
+    # created one submission at a time, as submissions can share their submitter's folder,
+    # and a failure for one submission doesn't stop the others from being processed.
+    failed_ids = helpers.for_each_submission(
+        lambda submission_id: create_folders(
+            project_name=args.project_name,
+            submission_id=submission_id,
+            private_folders=private_folders,
+        ),
+        submission_ids,
+        max_workers=1,
+    )
+    if failed_ids:
+        sys.exit(f"Failed to create the folders for submission(s): {','.join(failed_ids)}")
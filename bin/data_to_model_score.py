@@ -1,10 +1,10 @@
 #!/usr/bin/env python3
 
-import json
-import os
 import sys
 import typing
 
+import helpers
+
 
 INVALID = "INVALID"
 SCORED = "SCORED"
@@ -25,9 +25,6 @@ def score_submission(predictions_path: str, status: str) -> typing.Tuple[str, di
         score = None
         message = f"Submission was not scored due to {INVALID} status"
     else:
-        # placeholder file reading
-        with open(predictions_path, "r") as sub_file:
-            predictions_contents = sub_file.read()
         try:
             # placeholder scoring
             score = 1 + 1
@@ -45,21 +42,6 @@ def score_submission(predictions_path: str, status: str) -> typing.Tuple[str, di
     return score_status, result
 
 
-def update_json(results_path: str, result: dict) -> None:
-    """Update the results.json file with the current score and status
-
-    Args:
-        results_path: path to the results.json file
-        result: dictionary containing score, status and errors
-    """
-    file_size = os.path.getsize(results_path)
-    with open(results_path, "r") as o:
-        data = json.load(o) if file_size else {}
-    data.update(result)
-    with open(results_path, "w") as o:
-        o.write(json.dumps(data))
-
-
 if __name__ == "__main__":
     submission_id = sys.argv[1]
     status = sys.argv[2]
@@ -67,5 +49,5 @@ if __name__ == "__main__":
     staged_path = sys.argv[4]
     results_path = sys.argv[5]
     score_status, result = score_submission(predictions_path, status)
-    update_json(results_path, result)
+    helpers.update_json(results_path, result)
     print(score_status)
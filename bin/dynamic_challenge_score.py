@@ -1,19 +1,61 @@
 #!/usr/bin/env python3
 
 import argparse
-import json
+import io
 import os
 import typing
+from functools import partial
 
 import tarfile
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
-from typing import Tuple, List
-import synapseclient
+from typing import TYPE_CHECKING, Dict, Tuple, List
+
+import helpers
+
+if TYPE_CHECKING:
+    import synapseclient
+
+try:
+    # scipy's FFTs can spread a batch of transforms over several CPU cores,
+    # as many as ``set_fft_workers`` gives each scoring process
+    import scipy.fft as fft_backend
+
+    FFT_OPTIONS = {"workers": 1}
+except ImportError:
+    fft_backend = np.fft
+    FFT_OPTIONS = {}
+
+
+try:
+    # Numba compiles the ODE histogram counting into a single pass over the values
+    from numba import njit
+except ImportError:
+    njit = None
 
 
 INVALID = "INVALID"
 SCORED = "SCORED"
 
+# Ranges of the unit-width histograms of the three variables compared by the ODE metric
+ODE_HISTOGRAM_RANGES = ((-20, 20), (-20, 20), (0, 50))
+ODE_HISTOGRAM_SIZE = max(hi - lo for lo, hi in ODE_HISTOGRAM_RANGES)
+
+
+def get_max_workers() -> int:
+    """Get the number of CPUs to score with: the ``SCORING_MAX_WORKERS`` environment
+    variable, which the workflow sets to the CPUs allotted to the task, or else
+    the CPUs that the process may run on.
+
+    Returns:
+        The number of CPUs
+    """
+    if os.environ.get("SCORING_MAX_WORKERS"):
+        return int(os.environ["SCORING_MAX_WORKERS"])
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
 
 def get_args():
     """Set up command-line interface and get arguments without any flags."""
@@ -33,6 +75,13 @@ def get_args():
         default="results.json",
         help="The path to output file",
     )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=get_max_workers(),
+        help="The number of CPUs to score with. Defaults to $SCORING_MAX_WORKERS, "
+        "or else the CPUs available to the process",
+    )
 
     return parser.parse_args()
 
@@ -52,19 +101,106 @@ def tar(directory: str, tar_filename: str) -> None:
         os.chdir(original_dir)
 
 
-def untar(directory: str, tar_filename: str, pattern="*") -> None:
-    """Untar a tar file into a directory
+def get_tar_members(tar_filename: str, pattern: str) -> Dict[str, tarfile.TarInfo]:
+    """Index the files of a tar file by their base name, so they can be read
+    straight from the tar file without extracting them
 
     Arguments:
-        directory: Path to directory to untar files
-        tar_filename:  tar file path
-        pattern: pattern to match
+        tar_filename: tar file path
+        pattern: ending of the names of the files to index
+
+    Returns:
+        The matching members of the tar file, keyed by their base name
     """
     with tarfile.open(tar_filename, "r") as tar_f:
-        for member in tar_f.getmembers():
-            if member.isfile() and member.name.endswith(pattern):
-                member.name = os.path.basename(member.name)
-                tar_f.extract(member, path=directory)
+        # Members are read lazily as the archive is iterated, instead of indexing all of them first
+        return {
+            os.path.basename(member.name): member
+            for member in tar_f
+            if member.isfile() and member.name.endswith(pattern)
+        }
+
+
+def spectral_norm(matrix: np.ndarray) -> float:
+    """Largest singular value of a matrix, like ``np.linalg.norm(matrix, 2)``.
+    It is computed from the eigenvalues of the smaller Gram matrix, which is much
+    cheaper than the full SVD done by numpy for the tall matrices scored here.
+
+    Arguments:
+        matrix: 2D array
+
+    Returns:
+        The spectral norm of the matrix
+    """
+    if matrix.ndim != 2:
+        return np.linalg.norm(matrix, 2)
+    # Form the Gram matrix in floating point, as integer products would overflow
+    matrix = np.asarray(matrix, dtype=np.result_type(matrix.dtype, np.float64))
+    if matrix.shape[0] >= matrix.shape[1]:
+        gram = matrix.T @ matrix
+    else:
+        gram = matrix @ matrix.T
+    # Leave non-finite values to numpy, to keep its results and errors for them
+    if not np.isfinite(gram).all():
+        return np.linalg.norm(matrix, 2)
+    return np.sqrt(max(np.linalg.eigvalsh(gram)[-1], 0))
+
+
+def relative_error(truth: np.ndarray, prediction: np.ndarray) -> float:
+    """Spectral norm of the prediction error relative to the spectral norm of the truth.
+
+    Arguments:
+        truth: groundtruth data
+        prediction: predicted data
+
+    Returns:
+        The relative error of the prediction
+    """
+    return spectral_norm(truth - prediction) / spectral_norm(truth)
+
+
+def integer_histogram(values: np.ndarray, lo: int, hi: int) -> np.ndarray:
+    """Histogram of values over unit-width bins from lo to hi, padded with empty
+    bins up to ODE_HISTOGRAM_SIZE. Gives the same counts as
+    ``np.histogram(values, bins=np.arange(lo, hi + 1))``, without searching the bins.
+
+    Arguments:
+        values: values to count
+        lo: lower edge of the first bin
+        hi: upper edge of the last bin, which is closed like in ``np.histogram``
+
+    Returns:
+        Counts of the values in each bin
+    """
+    if njit is not None:
+        return count_integer_bins(values, lo, hi)
+
+    values = values[(values >= lo) & (values <= hi)]
+    bins = np.minimum(np.floor(values).astype(np.int64) - lo, hi - lo - 1)
+    return np.bincount(bins, minlength=ODE_HISTOGRAM_SIZE)
+
+
+def count_integer_bins(values: np.ndarray, lo: int, hi: int) -> np.ndarray:
+    """Loop version of ``integer_histogram`` that checks, bins and counts each value
+    in one pass. Only used when Numba is installed to compile it.
+
+    Arguments:
+        values: values to count
+        lo: lower edge of the first bin
+        hi: upper edge of the last bin, which is closed like in ``np.histogram``
+
+    Returns:
+        Counts of the values in each bin
+    """
+    counts = np.zeros(ODE_HISTOGRAM_SIZE, dtype=np.int64)
+    for value in values:
+        if lo <= value <= hi:
+            counts[min(int(np.floor(value)) - lo, hi - lo - 1)] += 1
+    return counts
+
+
+if njit is not None:
+    count_integer_bins = njit(cache=True)(count_integer_bins)
 
 
 def ode_forecast(
@@ -81,39 +217,29 @@ def ode_forecast(
     Returns:
         Tuple of long-time and short-time error scores
     """
-    est = np.linalg.norm(truth[:, 0:k] - prediction[:, 0:k], 2) / np.linalg.norm(
-        truth[:, 0:k], 2
-    )
+    est = relative_error(truth[:, 0:k], prediction[:, 0:k])
 
+    # Histograms of the last ``modes`` values of each variable, stacked so that
+    # all the relative errors are computed at once
     yt = truth[-modes:, :]
-    M = np.arange(-20, 21, 1)
-    M2 = np.arange(0, 51, 1)
-    yhistxt, _ = np.histogram(yt[0, :], bins=M)
-    yhistyt, _ = np.histogram(yt[1, :], bins=M)
-    yhistzt, _ = np.histogram(yt[2, :], bins=M2)
-
     yp = prediction[-modes:, :]
-    yhistxp, _ = np.histogram(yp[0, :], bins=M)
-    yhistyp, _ = np.histogram(yp[1, :], bins=M)
-    yhistzp, _ = np.histogram(yp[2, :], bins=M2)
-
-    norm_yhistxt = np.linalg.norm(yhistxt, 2)
-    eltx = (
-        np.linalg.norm(yhistxt - yhistxp, 2) /
-        norm_yhistxt if norm_yhistxt > 0 else 0
+    hist_truth = np.stack(
+        [integer_histogram(yt[i, :], lo, hi)
+         for i, (lo, hi) in enumerate(ODE_HISTOGRAM_RANGES)]
     )
-    norm_yhistyt = np.linalg.norm(yhistyt, 2)
-    elty = (
-        np.linalg.norm(yhistyt - yhistyp, 2) /
-        norm_yhistyt if norm_yhistyt > 0 else 0
-    )
-    norm_yhistzt = np.linalg.norm(yhistzt, 2)
-    eltz = (
-        np.linalg.norm(yhistzt - yhistzp, 2) /
-        norm_yhistzt if norm_yhistzt > 0 else 0
+    hist_prediction = np.stack(
+        [integer_histogram(yp[i, :], lo, hi)
+         for i, (lo, hi) in enumerate(ODE_HISTOGRAM_RANGES)]
     )
 
-    elt = (eltx + elty + eltz) / 3
+    norm_hist_truth = np.linalg.norm(hist_truth, axis=1)
+    hist_errors = np.divide(
+        np.linalg.norm(hist_truth - hist_prediction, axis=1),
+        norm_hist_truth,
+        out=np.zeros(len(ODE_HISTOGRAM_RANGES)),
+        where=norm_hist_truth > 0,
+    )
+    elt = hist_errors.mean()
 
     e1 = 100 * (1 - est)
     e2 = 100 * (1 - elt)
@@ -136,35 +262,30 @@ def pde_forecast(
         Tuple of long-time and short-time error scores
     """
     [m, n] = truth.shape
-    est = np.linalg.norm(truth[:, 0:k] - prediction[:, 0:k], 2) / np.linalg.norm(
-        truth[:, 0:k], 2
-    )
-
-    m2 = 2 * modes + 1
-    pt = np.empty((m2, 0))
-    pp = np.empty((m2, 0))
+    est = relative_error(truth[:, 0:k], prediction[:, 0:k])
 
     # LONG TIME:  Compute least-square fit to power spectra
-    for j in range(1, k + 1):
-        p_truth = np.multiply(
-            np.abs(np.fft.fft(truth[:, n - j])
-                   ), np.abs(np.fft.fft(truth[:, n - j]))
-        )
-        p_prediction = np.multiply(
-            np.abs(np.fft.fft(prediction[:, n - j])),
-            np.abs(np.fft.fft(prediction[:, n - j])),
-        )
-        pt3 = np.fft.fftshift(p_truth)
-        pp3 = np.fft.fftshift(p_prediction)
-        ptnew = pt3[int(m / 2) - modes: int(m / 2) + modes + 1]
-        ppnew = pp3[
-            int(m / 2) - modes: int(m / 2) + modes + 1
-        ]  # Fixed the variable name
+    # The last k time steps (latest first) are transformed together. Each step is copied
+    # into a contiguous row first, so the transforms don't gather strided columns, and
+    # in double precision, which numpy's FFTs would compute in even if scipy's would not.
+    truth_steps = np.ascontiguousarray(
+        truth[:, n - k:n][:, ::-1].T, dtype=np.result_type(truth.dtype, np.float64)
+    )
+    prediction_steps = np.ascontiguousarray(
+        prediction[:, n - k:n][:, ::-1].T,
+        dtype=np.result_type(prediction.dtype, np.float64),
+    )
+    p_truth = np.abs(fft_backend.fft(truth_steps, **FFT_OPTIONS)) ** 2
+    p_prediction = np.abs(fft_backend.fft(prediction_steps, **FFT_OPTIONS)) ** 2
+    pt3 = np.fft.fftshift(p_truth, axes=1)
+    pp3 = np.fft.fftshift(p_prediction, axes=1)
 
-        pt = np.column_stack((pt, np.log(ptnew)))
-        pp = np.column_stack((pp, np.log(ppnew)))
+    # The 2 * modes + 1 frequencies around the zero frequency, one column per time step
+    central_modes = slice(m // 2 - modes, m // 2 + modes + 1)
+    pt = np.log(pt3[:, central_modes]).T
+    pp = np.log(pp3[:, central_modes]).T
 
-    elt = np.linalg.norm(pt - pp, 2) / np.linalg.norm(pt, 2)
+    elt = relative_error(pt, pp)
 
     e1 = 100 * (1 - est)
     e2 = 100 * (1 - elt)
@@ -188,42 +309,50 @@ def pde_forecast_2d(
         Tuple of long-time and short-time error scores
     """
     [_, n] = truth.shape
-    est = np.linalg.norm(truth[:, 0:k] - prediction[:, 0:k], 2) / np.linalg.norm(
-        truth[:, 0:k], 2
-    )
-
-    m2 = 2 * modes + 1
-    pt = np.empty((m2, 0))
-    pp = np.empty((m2, 0))
+    est = relative_error(truth[:, 0:k], prediction[:, 0:k])
 
     # LONG TIME:  Compute least-square fit to power spectra
-    for j in range(1, k + 1):
-        truth_fft = np.abs(np.fft.fft2(
-            truth[:, n - j].reshape((nf, nf), order="F")))
-        prediction_fft = np.abs(
-            np.fft.fft2(prediction[:, n - j].reshape((nf, nf), order="F"))
-        )
-        p_truth = np.multiply(truth_fft, truth_fft)
-        p_prediction = np.multiply(prediction_fft, prediction_fft)
-        #        P_truth = np.multiply(np.abs(np.fft.fft(truth[:, n-j])), np.abs(np.fft.fft(truth[:, n-j])))
-        #        P_prediction = np.multiply(np.abs(np.fft.fft(prediction[:, n-j])), np.abs(np.fft.fft(prediction[:, n-j])))
-        pt3 = np.fft.fftshift(p_truth[:, int(nf / 2) + 1])
-        pp3 = np.fft.fftshift(p_prediction[:, int(nf / 2) + 1])
-
-        ptnew = pt3[int(nf / 2) - modes: int(nf / 2) + modes + 1]
-        # Fixed the variable name
-        ppnew = pp3[int(nf / 2) - modes: int(nf / 2) + modes + 1]
-
-        pt = np.column_stack((pt, np.log(ptnew)))
-        pp = np.column_stack((pp, np.log(ppnew)))
-
-    elt = np.linalg.norm(pt - pp, 2) / np.linalg.norm(pt, 2)
+    # Each of the last k time steps (latest first) is a column-major nf x nf field.
+    # Reshaping the transposed block in row-major order gives the transposed fields,
+    # so the wanted column of each field's spectrum is the same row of theirs.
+    # The fields are copied in double precision, as for ``pde_forecast``.
+    truth_fields = np.ascontiguousarray(
+        truth[:, n - k:n][:, ::-1].T, dtype=np.result_type(truth.dtype, np.float64)
+    ).reshape((k, nf, nf))
+    prediction_fields = np.ascontiguousarray(
+        prediction[:, n - k:n][:, ::-1].T,
+        dtype=np.result_type(prediction.dtype, np.float64),
+    ).reshape((k, nf, nf))
+    truth_fft = np.abs(fft_backend.fft2(truth_fields, **FFT_OPTIONS))
+    prediction_fft = np.abs(fft_backend.fft2(prediction_fields, **FFT_OPTIONS))
+    p_truth = truth_fft[:, nf // 2 + 1, :] ** 2
+    p_prediction = prediction_fft[:, nf // 2 + 1, :] ** 2
+    pt3 = np.fft.fftshift(p_truth, axes=1)
+    pp3 = np.fft.fftshift(p_prediction, axes=1)
+
+    # One column per time step, as for the 1D spectra
+    central_modes = slice(nf // 2 - modes, nf // 2 + modes + 1)
+    pt = np.log(pt3[:, central_modes]).T
+    pp = np.log(pp3[:, central_modes]).T
+
+    elt = relative_error(pt, pp)
     e1 = 100 * (1 - est)
     e2 = 100 * (1 - elt)
 
     return e1, e2
 
 
+# Forecast metric of each system, with its parameters bound
+SYSTEM_TO_FORECAST = {
+    "doublependulum": partial(ode_forecast, k=20, modes=1000),
+    "Lorenz": partial(ode_forecast, k=20, modes=1000),
+    "Rossler": partial(ode_forecast, k=20, modes=1000),
+    "KS": partial(pde_forecast, k=20, modes=100),
+    "Lorenz96": partial(pde_forecast, k=20, modes=30),
+    "Kolmogorov": partial(pde_forecast_2d, k=20, modes=30, nf=128),
+}
+
+
 def forecast(truth: np.ndarray, prediction: np.ndarray, system: str) -> List[float]:
     """Forecast scores.
 
@@ -236,28 +365,10 @@ def forecast(truth: np.ndarray, prediction: np.ndarray, system: str) -> List[flo
         List of forecast scores
     """
 
-    system_to_forecast = {
-        "doublependulum": {
-            "function": ode_forecast,
-            "params": {"k": 20, "modes": 1000},
-        },
-        "Lorenz": {"function": ode_forecast, "params": {"k": 20, "modes": 1000}},
-        "Rossler": {"function": ode_forecast, "params": {"k": 20, "modes": 1000}},
-        "KS": {"function": pde_forecast, "params": {"k": 20, "modes": 100}},
-        "Lorenz96": {"function": pde_forecast, "params": {"k": 20, "modes": 30}},
-        "Kolmogorov": {
-            "function": pde_forecast_2d,
-            "params": {"k": 20, "modes": 30, "nf": 128},
-        },
-    }
-
-    if system in system_to_forecast:
-        forecast_func = system_to_forecast[system]["function"]
-        forecast_params = system_to_forecast[system]["params"]
-        scores = forecast_func(truth, prediction, **forecast_params)
-        return list(scores)
-    else:
+    forecast_func = SYSTEM_TO_FORECAST.get(system)
+    if forecast_func is None:
         return []
+    return list(forecast_func(truth, prediction))
 
 
 def reconstruction(truth: np.ndarray, prediction: np.ndarray) -> float:
@@ -270,7 +381,7 @@ def reconstruction(truth: np.ndarray, prediction: np.ndarray) -> float:
     Returns:
         e1: reconstruction fit score
     """
-    est = np.linalg.norm(truth - prediction, 2) / np.linalg.norm(truth, 2)
+    est = relative_error(truth, prediction)
 
     e1 = 100 * (1 - est)
 
@@ -293,84 +404,201 @@ def house_zero_score(truth: np.ndarray, prediction: np.ndarray) -> Tuple[float,
     return error_room_temp, error_slab_temp, error_co2
 
 
+# Files to score for each evaluation queue: the prefix of the files, the metric to score
+# them with, and the names and indices (among those of the metric) of the scores to report
+TASK_MAPPING = {
+    "9615379": [("X1", "forecast", ["stf_E1", "ltf_E2"], [0, 1])],  # Task1
+    "9615532": [  # Task2
+        ("X2", "reconstruction", ["recon_E3"], [0]),
+        ("X3", "forecast", ["ltf_E4"], [1]),
+        ("X4", "reconstruction", ["recon_E5"], [0]),
+        ("X5", "forecast", ["ltf_E6"], [1]),
+    ],
+    "9615534": [("X6", "forecast", ["stf_E7", "ltf_E8"], [0, 1])],  # Task3
+    "9615535": [  # Task4
+        ("X7", "forecast", ["stf_E9", "ltf_E10"], [0, 1]),
+        ("X8", "reconstruction", ["recon_E11"], [0]),
+        ("X9", "reconstruction", ["recon_E12"], [0]),
+    ],
+    "9615601": [  # Task5
+        ("X21", "HouseZeroScore", ["rt_E21", "st_E21", "co2_E21"], [0, 1, 2]),
+        ("X74", "HouseZeroScore", ["rt_E74", "st_E74", "co2_E74"], [0, 1, 2]),
+    ],
+}
+
+
+def load_tar_npy(tar_f: tarfile.TarFile, member: tarfile.TarInfo) -> np.ndarray:
+    """Load a ``.npy`` file from a tar file, like ``np.load``. The array is read
+    straight into its own memory, so the file's bytes are not held in memory too.
+
+    Arguments:
+        tar_f: the open tar file
+        member: the ``.npy`` file in the tar file
+
+    Returns:
+        The loaded array
+    """
+    with tar_f.extractfile(member) as npy_file:
+        version = np.lib.format.read_magic(npy_file)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(npy_file)
+        elif version == (2, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(npy_file)
+        else:
+            shape, fortran_order, dtype = None, False, None
+
+        # Leave other format versions and arrays of objects (which np.load refuses
+        # without allow_pickle anyway) to np.load, from the member's bytes
+        if dtype is None or dtype.hasobject:
+            npy_file.seek(0)
+            return np.load(io.BytesIO(npy_file.read()))
+
+        array = np.empty(int(np.prod(shape)), dtype=dtype)
+        buffer = memoryview(array.view(np.uint8))
+        read = 0
+        while read < len(buffer):
+            n = npy_file.readinto(buffer[read:])
+            if not n:
+                raise ValueError(
+                    f"{member.name} is truncated: expected {len(buffer)} bytes of data, got {read}"
+                )
+            read += n
+        buffer.release()
+
+    return array.reshape(shape, order="F" if fortran_order else "C")
+
+
+def score_task(
+    truth_path: str,
+    predictions_path: str,
+    pred_member: tarfile.TarInfo,
+    system: str,
+    score_metric: str,
+    score_keys: List[str],
+    score_indices: List[int],
+) -> dict:
+    """Score the predictions of one task for one system.
+
+    Arguments:
+        truth_path: path to the groundtruth file
+        predictions_path: path to the predictions tar file
+        pred_member: the predictions file in the tar file
+        system: name of the system
+        score_metric: name of the metric to score the predictions with
+        score_keys: names of the scores to report
+        score_indices: indices of the reported scores among those of the metric
+
+    Returns:
+        dictionary containing the reported scores
+    """
+    # Memory-map the groundtruth, so only the parts used for scoring are read from disk,
+    # and read the predictions straight from the tar file without extracting them
+    truth = np.load(truth_path, mmap_mode="r")
+    with tarfile.open(predictions_path, "r") as tar_f:
+        pred = load_tar_npy(tar_f, pred_member)
+
+    if score_metric == "forecast":
+        scores = forecast(truth, pred, system)
+    elif score_metric == "reconstruction":
+        scores = (reconstruction(truth, pred),)
+    else:
+        scores = house_zero_score(truth, pred)
+
+    # Report the scores as plain floats, converted in one go
+    scores = np.asarray(scores, dtype=float).tolist()
+    return {
+        f"{system}_{key}": scores[index]
+        for key, index in zip(score_keys, score_indices)
+    }
+
+
+def set_fft_workers(workers: int) -> None:
+    """Set the number of threads each FFT may use in this process, if the FFT
+    backend supports using several.
+
+    Arguments:
+        workers: number of threads
+    """
+    if "workers" in FFT_OPTIONS:
+        FFT_OPTIONS["workers"] = workers
+
+
 def calculate_all_scores(
-    groundtruth_path: str, predictions_path: str, evaluation_id: str
+    groundtruth_path: str,
+    predictions_path: str,
+    evaluation_id: str,
+    max_workers: int = 1,
 ) -> dict:
     """Calculate scores across all testing datasets.
 
     Arguments:
         groundtruth_path: path to the groundtruth folder
-        predictions_path: path to the predictions file
+        predictions_path: path to the predictions tar file
         evaluation_id: id of the evaluation queue
+        max_workers: number of CPUs to score with
 
     Returns:
         score_result: dictionary containing scores
     """
     score_result = {}
-    task_mapping = {
-        "9615379": [("X1", "forecast", ["stf_E1", "ltf_E2"], [0, 1])],  # Task1
-        "9615532": [  # Task2
-            ("X2", "reconstruction", ["recon_E3"], [0]),
-            ("X3", "forecast", ["ltf_E4"], [1]),
-            ("X4", "reconstruction", ["recon_E5"], [0]),
-            ("X5", "forecast", ["ltf_E6"], [1]),
-        ],
-        "9615534": [("X6", "forecast", ["stf_E7", "ltf_E8"], [0, 1])],  # Task3
-        "9615535": [  # Task4
-            ("X7", "forecast", ["stf_E9", "ltf_E10"], [0, 1]),
-            ("X8", "reconstruction", ["recon_E11"], [0]),
-            ("X9", "reconstruction", ["recon_E12"], [0]),
-        ],
-        "9615601": [  # Task5
-            ("X21", "HouseZeroScore", [
-             "rt_E21", "st_E21", "co2_E21"], [0, 1, 2]),
-            ("X74", "HouseZeroScore", [
-             "rt_E74", "st_E74", "co2_E74"], [0, 1, 2]),
-        ]
-    }
-
+    pred_members = get_tar_members(predictions_path, pattern=".npy")
     # get mapping of inputs and outs for specific task
-    task_info = task_mapping.get(evaluation_id)
+    task_info = TASK_MAPPING.get(evaluation_id)
 
-    # get unique systems
-    pred_files = os.listdir(predictions_path)
-    pred_systems = list(set(f.split("_")[0] for f in pred_files))
+    # get the systems that can be scored
     if evaluation_id == "9615601":
         true_systems = ["HouseZero"]
     else:
         true_systems = ["doublependulum", "Lorenz",
                         "Rossler", "Lorenz96", "KS", "Kolmogorov"]
-    unique_systems = list(set(true_systems) & set(pred_systems))
 
-    for system in unique_systems:
+    # score provided required files
+    score_jobs = []
+    for system in true_systems:
         for prefix, score_metric, score_keys, score_indices in task_info:
             truth_path = os.path.join(
                 groundtruth_path, f"Test_{system}/{prefix}test.npy"
             )
-            pred_path = os.path.join(
-                predictions_path, f"{system}_{prefix}prediction.npy"
-            )
-
-            # score provided required files
-            if os.path.exists(pred_path):
-                truth = np.load(truth_path)
-                pred = np.load(pred_path)
-
-                if score_metric == "forecast":
-                    scores = forecast(truth, pred, system)
-                elif score_metric == "reconstruction":
-                    scores = (reconstruction(truth, pred),)
-                else:
-                    scores = house_zero_score(truth, pred)
-
-                for key, index in zip(score_keys, score_indices):
-                    score_result[f"{system}_{key}"] = scores[index]
+            pred_member = pred_members.get(f"{system}_{prefix}prediction.npy")
+            if pred_member:
+                score_jobs.append(
+                    (
+                        truth_path,
+                        predictions_path,
+                        pred_member,
+                        system,
+                        score_metric,
+                        score_keys,
+                        score_indices,
+                    )
+                )
+
+    # Each file is scored independently, so they are scored in parallel processes,
+    # which share the CPUs given to scoring between their FFT threads
+    processes = max(1, min(len(score_jobs), max_workers))
+    if processes == 1:
+        # Starting a process pool isn't worth it for a single process
+        set_fft_workers(max(1, max_workers))
+        for job in score_jobs:
+            score_result.update(score_task(*job))
+    elif score_jobs:
+        with ProcessPoolExecutor(
+            max_workers=processes,
+            initializer=set_fft_workers,
+            initargs=(max(1, max_workers // processes),),
+        ) as executor:
+            for scores in executor.map(score_task, *zip(*score_jobs)):
+                score_result.update(scores)
 
     return score_result
 
 
 def score_submission(
-    groundtruth_path: str, predictions_path: str, evaluation_id: str, status: str
+    groundtruth_path: str,
+    predictions_path: str,
+    evaluation_id: str,
+    status: str,
+    max_workers: int = 1,
 ) -> typing.Tuple[str, dict]:
     """Determine the score of a submission.
 
@@ -379,6 +607,7 @@ def score_submission(
         predictions_path: path to the predictions file
         evaluation_id: id of the evaluation queue
         status: current submission status
+        max_workers: number of CPUs to score with
 
     Returns:
         Tuple: score status string and dictionary containing score, status and errors
@@ -389,12 +618,10 @@ def score_submission(
         message = f"Submission was not scored due to {INVALID} status"
     else:
         try:
-            # assume predictions are compressed into a tarball file
-            # untar the predictions into 'predictions' folder
-            untar("predictions", tar_filename=predictions_path, pattern=".npy")
-            # score the predictions
+            # assume predictions are compressed into a tarball file,
+            # and score the predictions straight from it
             scores = calculate_all_scores(
-                groundtruth_path, "predictions", evaluation_id
+                groundtruth_path, predictions_path, evaluation_id, max_workers
             )
             score_status = SCORED
             message = ""
@@ -414,7 +641,7 @@ def score_submission(
     return score_status, result
 
 
-def get_eval_id(syn: synapseclient.Synapse, submission_id: str) -> str:
+def get_eval_id(syn: "synapseclient.Synapse", submission_id: str) -> str:
     """Get evaluation id for the submission
 
     Arguments:
@@ -436,21 +663,6 @@ def get_eval_id(syn: synapseclient.Synapse, submission_id: str) -> str:
         )
 
 
-def update_json(results_path: str, result: dict) -> None:
-    """Update the results.json file with the current score and status
-
-    Arguments:
-        results_path: path to the results.json file
-        result: dictionary containing score, status and errors
-    """
-    file_size = os.path.getsize(results_path)
-    with open(results_path, "r") as o:
-        data = json.load(o) if file_size else {}
-    data.update(result)
-    with open(results_path, "w") as o:
-        o.write(json.dumps(data))
-
-
 if __name__ == "__main__":
     args = get_args()
     sub_id = args.submission_id
@@ -460,19 +672,18 @@ if __name__ == "__main__":
     results_path = args.output
 
     # login to synapase
-    syn = synapseclient.Synapse()
-    syn.login(silent=True)
+    syn = helpers.get_syn()
 
     # get the evaluation ID to identify corresponding scoring parameters
     eval_id = get_eval_id(syn, sub_id)
 
     # get scores of submission
     score_status, result = score_submission(
-        groundtruth_path, predictions_path, eval_id, status
+        groundtruth_path, predictions_path, eval_id, status, args.max_workers
     )
 
     # update the scores and status for the submsision
-    update_json(results_path, result)
+    helpers.update_json(results_path, result)
 
     # print the status - captured by the workflow outputs
     print(score_status)
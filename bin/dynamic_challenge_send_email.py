@@ -5,12 +5,15 @@ send email notofications for the dynamic challenge
 """
 
 import sys
-import synapseclient
+from functools import lru_cache
+from typing import List, Tuple
 
-from typing import Tuple
+import synapseclient
 
-from helpers import get_participant_id
+from helpers import for_each_submission, get_participant_id, get_syn
 from send_email import (
+    SEND_ATTEMPTS,
+    SEND_MAX_THREADS,
     get_score_dict,
     get_annotations,
 )
@@ -19,6 +22,30 @@ from send_email import (
 BEFORE = "BEFORE"
 AFTER = "AFTER"
 
+# E-mail bodies for each (submission status, email_with_score) pair, filled in with ``str.format``
+EMAIL_TEMPLATES = {
+    ("VALIDATED", "yes"): (
+        "Submission {submission_id} has been evaluated with the following scores:\n\n"
+        "{scores}"
+        "\n\nView all your submissions here: {target_link}."
+    ),
+    ("VALIDATED", "no"): (
+        "Submission {submission_id} has been evaluated. Your score will be available after "
+        "Challenge submissions are closed. Thank you for participating!"
+    ),
+    ("INVALID", "yes"): (
+        "Evaluation failed for Submission {submission_id}.\n"
+        "Reason: '{reason}'.\n"
+        "View your submissions here: {target_link}.\n"
+        "Please contact the organizers for more information."
+    ),
+    ("INVALID", "no"): (
+        "Evaluation failed for Submission {submission_id}.\n"
+        "Reason: '{reason}'.\n"
+        "Please contact the organizers for more information."
+    ),
+}
+
 
 def email_template(
     status: str,
@@ -44,47 +71,41 @@ def email_template(
       A string for that represents the body of the e-mail to be sent out to submitting team or individual.
 
     """
-    templates = {
-        (
-            "VALIDATED",
-            "yes",
-        ): f"Submission {submission_id} has been evaluated with the following scores:\n"
-        + "\n".join(get_score_dict(score))
-        + f"\nView all your submissions here: {target_link}.",
-        (
-            "VALIDATED",
-            "no",
-        ): f"Submission {submission_id} has been evaluated. Your score will be available after Challenge submissions are closed. Thank you for participating!",
-        (
-            "INVALID",
-            "yes",
-        ): f"Evaluation failed for Submission {submission_id}."
-        + "\n"
-        + f"Reason: '{reason}'."
-        + "\n"
-        + f"View your submissions here: {target_link}."
-        + "\n"
-        + "Please contact the organizers for more information.",
-        (
-            "INVALID",
-            "no",
-        ): f"Evaluation failed for Submission {submission_id}."
-        + "\n"
-        + f"Reason: '{reason}'."
-        + "\n"
-        + "Please contact the organizers for more information.",
-    }
-
-    body = templates.get((status, email_with_score))
+    template = EMAIL_TEMPLATES.get((status, email_with_score))
 
-    # If there is a typo in ``email_with_score``, ``body`` will be None;
+    # If there is a typo in ``email_with_score``, ``template`` will be None;
     # Raise an error if so, to avoid sending empty e-mails...
-    if body is None:
+    if template is None:
         raise ValueError(
             f"Incorrect status and/or email_with_score arguments. Got status: {status}, email_with_score: {email_with_score}."
         )
 
-    return body
+    # Only list the scores for the templates that show them
+    scores = "\n".join(get_score_dict(score)) if "{scores}" in template else ""
+
+    return template.format(
+        submission_id=submission_id,
+        target_link=target_link,
+        scores=scores,
+        reason=reason,
+    )
+
+
+@lru_cache(maxsize=64)
+def lookup_evaluation(
+    syn: synapseclient.Synapse, eval_id: str
+) -> synapseclient.Evaluation:
+    """Get the evaluation with the given id. Evaluations do not change while
+    notifications are being sent, so lookups are cached to avoid repeating requests.
+
+    Arguments:
+        syn: Synapse connection
+        eval_id: the evaluation id
+
+    Returns:
+        The evaluation
+    """
+    return syn.getEvaluation(eval_id)
 
 
 def get_evaluation(syn: synapseclient.Synapse, submission_id: str) -> Tuple[str, str]:
@@ -104,7 +125,7 @@ def get_evaluation(syn: synapseclient.Synapse, submission_id: str) -> Tuple[str,
         eval_id = syn.getSubmission(submission_id, downloadFile=False).get(
             "evaluationId"
         )
-        eval_name = syn.getEvaluation(eval_id).get("name")
+        eval_name = lookup_evaluation(syn, eval_id).get("name")
         return eval_id, eval_name
     except Exception as e:
         print(
@@ -134,7 +155,7 @@ def get_target_link(synapse_client: synapseclient.Synapse, eval_id: str) -> str:
     link = EVAL_TO_LINK.get(eval_id, None)
     if link:
         return link
-    project_id = synapse_client.getEvaluation(eval_id).get("contentSource")
+    project_id = lookup_evaluation(synapse_client, eval_id).get("contentSource")
     return f"https://www.synapse.org/#!Synapse:{project_id}"
 
 
@@ -157,7 +178,7 @@ def send_email(
         raise ValueError(
             f"Invalid notification_type. Must be '{BEFORE}' or '{AFTER}'")
     # Initiate connection to Synapse
-    syn = synapseclient.login()
+    syn = get_syn()
 
     # Get the Synapse users to send an e-mail to
     ids_to_notify = get_participant_id(syn, submission_id)
@@ -198,12 +219,42 @@ def send_email(
                     messageSubject=subject, messageBody=body)
 
 
+def send_emails(
+    submission_ids: List[str], email_with_score: str, notification_type: str
+) -> List[str]:
+    """
+    Sends the e-mails on the status of several submissions concurrently,
+    sharing one logged in Synapse client.
+
+    Arguments:
+      submission_ids: The IDs of the submissions to send e-mails for
+      email_with_score: Whether to include the score in the e-mails
+      notification_type: The type of notification to send
+
+    Returns:
+      The IDs of the submissions whose e-mails could not be sent
+    """
+    return for_each_submission(
+        lambda submission_id: send_email(
+            submission_id, email_with_score, notification_type
+        ),
+        submission_ids,
+        SEND_MAX_THREADS,
+        attempts=SEND_ATTEMPTS,
+    )
+
+
 if __name__ == "__main__":
     # Keeping view_id in despite not being used.
     # This is so that we can still use one `send_email.nf` process while supporting both `BEFORE` and `AFTER` notifications
     view_id = sys.argv[1]
-    submission_id = sys.argv[2]
+    # One submission ID, or several separated by commas
+    submission_ids = sys.argv[2].split(",")
     email_with_score = sys.argv[3]
     notification_type = sys.argv[4]
 
-    send_email(submission_id, email_with_score, notification_type)
+    # The e-mails that fail are retried on their own, and a batch that still has failures
+    # doesn't fail the task: retrying the task would send the whole batch's e-mails again
+    failed_ids = send_emails(submission_ids, email_with_score, notification_type)
+    if failed_ids:
+        print(f"Failed to send the e-mails for submission(s): {','.join(failed_ids)}")
@@ -2,15 +2,40 @@
 
 import argparse
 import tarfile
-from typing import List
-import synapseclient
-import json
+from typing import TYPE_CHECKING, FrozenSet
 import os
 
+import helpers
+
+if TYPE_CHECKING:
+    import synapseclient
+
 
 INVALID = "INVALID"
 VALIDATED = "VALIDATED"
 
+# Prefixes of the prediction files expected for each evaluation queue
+TASK_MAPPING = {
+    "9615379": ["X1"],  # Task1
+    "9615532": ["X2", "X3", "X4", "X5"],  # Task2
+    "9615534": ["X6"],  # Task3
+    "9615535": ["X7", "X8", "X9"],  # Task4
+    "9615601": ["X21", "X74"],  # Task5
+}
+# Systems that predictions are expected for, by default and for the queues that differ from it
+DEFAULT_SYSTEMS = ["doublependulum", "Lorenz", "Rossler", "Lorenz96", "KS", "Kolmogorov"]
+EVAL_SYSTEMS = {"9615601": ["HouseZero"]}  # Task5
+
+# Names of the prediction files expected for each evaluation queue
+EXPECTED_FILENAMES = {
+    eval_id: frozenset(
+        f"{system}_{file_prefix}prediction.npy"
+        for file_prefix in file_prefixes
+        for system in EVAL_SYSTEMS.get(eval_id, DEFAULT_SYSTEMS)
+    )
+    for eval_id, file_prefixes in TASK_MAPPING.items()
+}
+
 
 def get_args():
     """Set up command-line interface and get arguments without any flags."""
@@ -30,38 +55,16 @@ def get_args():
     return parser.parse_args()
 
 
-def get_expected_filenames(eval_id: str) -> List[str]:
-    """Generates a list of expected filename patterns based on the evaluation ID.
+def get_expected_filenames(eval_id: str) -> FrozenSet[str]:
+    """Gets the expected filenames based on the evaluation ID.
 
     Arguments:
         eval_id: The evaluation ID.
 
     Returns:
-        A list of expected filename patterns.
+        The set of expected filenames.
     """
-    if eval_id == "9615601":
-        expected_systems = ["HouseZero"]
-    else:
-        expected_systems = [
-            "doublependulum",
-            "Lorenz",
-            "Rossler",
-            "Lorenz96",
-            "KS",
-            "Kolmogorov",
-        ]
-    task_mapping = {
-        "9615379": ["X1"],  # Task1
-        "9615532": ["X2", "X3", "X4", "X5"],  # Task2
-        "9615534": ["X6"],  # Task3
-        "9615535": ["X7", "X8", "X9"],  # Task4
-        '9615601': ["X21", "X74"],  # Task5
-    }
-    expected_patterns = []
-    for file_prefix in task_mapping[eval_id]:
-        for system in expected_systems:
-            expected_patterns.append(f"{system}_{file_prefix}prediction.npy")
-    return expected_patterns
+    return EXPECTED_FILENAMES[eval_id]
 
 
 def untar(directory: str, tar_filename: str, pattern="*") -> None:
@@ -70,15 +73,24 @@ def untar(directory: str, tar_filename: str, pattern="*") -> None:
     Arguments:
         directory: Path to directory to untar files
         tar_filename:  tar file path
+        pattern: ending of the names of the files to untar, or "*" for all files
     """
-    with tarfile.open(tar_filename, "r") as tar:
-        for member in tar.getmembers():
-            if member.isfile() and member.name.endswith(pattern):
-                member.name = os.path.basename(member.name)
-                tar.extract(member, path=directory)
-
-
-def get_eval_id(syn: synapseclient.Synapse, submission_id: str) -> str:
+    suffix = "" if pattern == "*" else pattern
+    os.makedirs(directory, exist_ok=True)
+    # Read the tar file as a stream in a single pass, through a 1 MiB buffer,
+    # so tarfile neither seeks around the archive nor keeps all its members
+    with open(tar_filename, "rb", buffering=helpers.COPY_BUFFER_SIZE) as tar_file, tarfile.open(
+        fileobj=tar_file, mode="r|*"
+    ) as tar:
+        for member in tar:
+            if member.isfile() and member.name.endswith(suffix):
+                # Flatten the member into the directory
+                target_path = os.path.join(directory, os.path.basename(member.name))
+                with tar.extractfile(member) as source, open(target_path, "wb") as target:
+                    helpers.copy_member(source, target)
+
+
+def get_eval_id(syn: "synapseclient.Synapse", submission_id: str) -> str:
     """Get evaluation id for the submission
 
     Arguments:
@@ -104,24 +116,30 @@ if __name__ == "__main__":
     predictions_path = args.predictions_path
     results_path = args.output
 
-    # login to synapase
-    syn = synapseclient.Synapse()
-    syn.login(silent=True)
-
-    # get the evaluation ID to identify corresponding scoring parameters
-    eval_id = get_eval_id(syn, sub_id)
-
     invalid_reasons = []
 
     if predictions_path is None or os.path.basename(predictions_path) != 'predictions.tar':
         prediction_status = INVALID
         invalid_reasons.append('Error:  No "predictions.tar" found')
+    elif os.path.getsize(predictions_path) == 0 or not tarfile.is_tarfile(predictions_path):
+        # Cheap checks on the archive itself, before logging in and extracting it
+        prediction_status = INVALID
+        invalid_reasons.append(
+            'Error: "predictions.tar" is empty or is not a valid tar file.'
+        )
     else:
+        # login to synapase only once there is a tarball worth validating
+        syn = helpers.get_syn()
+
+        # get the evaluation ID to identify corresponding scoring parameters
+        eval_id = get_eval_id(syn, sub_id)
+
         expected_files = get_expected_filenames(eval_id)
         untar("val_predictions", tar_filename=predictions_path, pattern=".npy")
-        pred_files = os.listdir("val_predictions")
-
-        matched_files = [f for f in pred_files if f in expected_files]
+        with os.scandir("val_predictions") as pred_files:
+            matched_files = expected_files.intersection(
+                f.name for f in pred_files if f.is_file()
+            )
 
         if not matched_files:
             prediction_status = INVALID
@@ -136,6 +154,5 @@ if __name__ == "__main__":
         "validation_errors": ";".join(invalid_reasons),
     }
 
-    with open(results_path, "w") as o:
-        o.write(json.dumps(result))
+    helpers.write_json(results_path, result)
     print(prediction_status)
@@ -1,12 +1,118 @@
 #!/usr/bin/env python3
 
+import csv
+import json
+import math
 import os
-from typing import List
+import pathlib
+import queue
+import stat
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, BinaryIO, Callable, Dict, List, Optional
 
-import synapseclient
+# synapseclient (and the requests stack under it) is imported where it is used, so the
+# scripts that only need the JSON and file helpers here don't pay for importing it
+if TYPE_CHECKING:
+    import synapseclient
 
+try:
+    # orjson (de)serializes JSON much faster than the standard library, when it is installed
+    import orjson
+except ImportError:
+    orjson = None
 
-def get_participant_id(syn: synapseclient.Synapse, submission_id: str) -> List[str]:
+# Name of the file that ``create_folders.py`` uses to hand the Synapse IDs
+# of a submission's folders over to ``update_folders.py``
+FOLDER_IDS_FILENAME = "folder_ids_{submission_id}.json"
+
+# Size of the chunks that archive members are copied out in, and the buffers reused
+# for it, so extracting many members doesn't allocate a new buffer for each of them
+COPY_BUFFER_SIZE = 1024 * 1024
+COPY_BUFFERS = queue.LifoQueue()
+
+# Seconds to wait before processing the submissions that failed again
+RETRY_WAIT = 10
+
+
+@lru_cache(maxsize=1)
+def get_syn() -> "synapseclient.Synapse":
+    """
+    Logs into Synapse once per process and returns the logged in client, so that
+    every caller shares the same authenticated session and its open connections.
+    The version check done by a new client is skipped to save a request, and the
+    session's connection pool is sized for concurrent requests.
+
+    Returns:
+      A logged in Synapse Python client instance
+
+    """
+    import synapseclient
+    from requests.adapters import HTTPAdapter
+
+    syn = synapseclient.Synapse(skip_checks=True)
+
+    # Keep enough pooled connections alive for the requests made concurrently from threads.
+    # Transient errors are left for the client's own retries to handle.
+    adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32)
+    syn._requests_session.mount("https://", adapter)
+
+    # Log in with the token that the workflow provides as a secret, if it is set,
+    # rather than having the client look for credentials in its config files
+    syn.login(authToken=os.environ.get("SYNAPSE_AUTH_TOKEN"), silent=True)
+
+    return syn
+
+
+def for_each_submission(
+    function: Callable[[str], Any],
+    submission_ids: List[str],
+    max_workers: int,
+    attempts: int = 1,
+) -> List[str]:
+    """
+    Calls ``function`` with each of the given submission IDs from a pool of threads, which
+    share the client from ``get_syn``. A failure for one submission doesn't stop the others:
+    every submission is processed, the ones that failed are retried on their own (up to
+    ``attempts`` times in all), and the submissions that still fail are printed and returned.
+
+    Arguments:
+      function: The function to call with each submission ID
+      submission_ids: The IDs of the submissions
+      max_workers: The number of submissions processed at the same time
+      attempts: The number of times a submission is tried before giving up on it
+
+    Returns:
+      The IDs of the submissions that ``function`` failed for
+
+    """
+    # Log in before the threads start, so they don't race to log in themselves
+    get_syn()
+
+    def run(submission_id: str) -> Optional[str]:
+        try:
+            function(submission_id)
+        except Exception as e:
+            print(f"Failed to process submission {submission_id}: {e!r}")
+            return submission_id
+        return None
+
+    failed_ids = list(submission_ids)
+    for attempt in range(attempts):
+        if attempt:
+            print(f"Retrying submission(s) {','.join(failed_ids)} in {RETRY_WAIT} seconds...")
+            time.sleep(RETRY_WAIT)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(run, failed_ids))
+        failed_ids = [submission_id for submission_id in results if submission_id is not None]
+        if not failed_ids:
+            break
+    return failed_ids
+
+
+def get_participant_id(syn: "synapseclient.Synapse", submission_id: str) -> List[str]:
     """
     Retrieves the teamId of the participating team that made
     the submission. If the submitter is an individual rather than
@@ -31,6 +137,272 @@ def get_participant_id(syn: synapseclient.Synapse, submission_id: str) -> List[s
     return [participant_id]
 
 
+@lru_cache(maxsize=1024)
+def find_entity_id(
+    syn: "synapseclient.Synapse",
+    name: str,
+    parent: Optional[str] = None,
+) -> Optional[str]:
+    """
+    Retrieves the Synapse ID of the entity with the given name under ``parent``.
+    Entity IDs do not change over the course of a workflow run, so lookups are
+    cached to avoid repeating the same request.
+
+    Arguments:
+      syn: A Synapse Python client instance
+      name: The name of the entity to find
+      parent: The synapse Id of the parent. If omitted, a Project is looked up.
+
+    Returns:
+      The synID of the entity, or None if it does not exist
+
+    """
+    return syn.findEntityId(name, parent)
+
+
+@lru_cache(maxsize=1024)
+def get_child_folders(syn: "synapseclient.Synapse", parent_id: str) -> Dict[str, str]:
+    """
+    Retrieves all the Folders directly under ``parent_id`` with a single listing of its
+    children, rather than looking each Folder up by name. The listing is cached, since
+    the Folders do not change over the course of a workflow run.
+
+    Arguments:
+      syn: A Synapse Python client instance
+      parent_id: The synapse Id of the parent
+
+    Returns:
+      The synIDs of the child Folders, keyed by their names
+
+    """
+    return {
+        child["name"]: child["id"]
+        for child in syn.getChildren(parent_id, includeTypes=["folder"])
+    }
+
+
+def get_entity_type(syn: "synapseclient.Synapse", submission_id: str) -> str:
+    """
+    Retrieves entity type from submission
+
+    Arguments:
+      syn: Synapse connection
+      submission_id: Submission ID to be queried
+
+    Returns:
+      Entity type of the submission
+
+    """
+    file_handle = syn.getSubmission(submission_id, downloadFile=False)
+    entity_bundle = json.loads(file_handle.get("entityBundleJSON"))
+    entity_type = entity_bundle.get("entityType")
+
+    return entity_type
+
+
+@lru_cache(maxsize=128)
+def get_submission_image(syn: "synapseclient.Synapse", submission_id: str) -> str:
+    """
+    Retrieves Docker Image ID from submission. Submissions do not change,
+    so lookups are cached to avoid repeating the same request.
+
+    Arguments:
+      syn: Synapse connection
+      submission_id: Submission ID to be queried
+
+    Returns:
+      image_id: Docker image identifier in the format: '<image_name>@<sha_code>'
+
+    Raises:
+      ValueError: If submission has no associated Docker image
+
+    """
+    submission = syn.getSubmission(submission_id, downloadFile=False)
+    docker_repository = submission.get("dockerRepositoryName", None)
+    docker_digest = submission.get("dockerDigest", None)
+    if not docker_digest or not docker_repository:
+        entity_type = get_entity_type(syn, submission_id)
+        input_error = f"InputError: Submission {submission_id} should be a Docker image, not {entity_type}"
+        print(input_error)
+        return input_error
+    image_id = f"{docker_repository}@{docker_digest}"
+
+    return image_id
+
+
+def read_manifest(manifest_path: str, required_columns: List[str]) -> List[Dict[str, str]]:
+    """
+    Reads a tab-separated manifest with one row per item to be processed, so that a single
+    process (and Synapse session) can handle many submissions at once.
+
+    Arguments:
+      manifest_path: The path to the manifest, which must have a header row
+      required_columns: The columns that the manifest must have
+
+    Returns:
+      The rows of the manifest, each keyed by column name
+
+    Raises:
+      ValueError: If the manifest is missing any of the required columns,
+                  or a row is missing any of their values
+
+    """
+    rows = []
+    with open(manifest_path, newline="") as file:
+        reader = csv.DictReader(file, delimiter="\t")
+        missing_columns = set(required_columns) - set(reader.fieldnames or [])
+        if missing_columns:
+            raise ValueError(
+                f"Manifest {manifest_path} is missing required columns: {sorted(missing_columns)}. Exiting."
+            )
+        for row in reader:
+            # DictReader fills the cells missing from a short row with None
+            missing_values = [column for column in required_columns if row[column] is None]
+            if missing_values:
+                raise ValueError(
+                    f"Line {reader.line_num} of manifest {manifest_path} is missing values for columns: {missing_values}. Exiting."
+                )
+            rows.append({column: row[column].strip() for column in required_columns})
+    return rows
+
+
+def dumps_json(data: Dict[str, Any]) -> bytes:
+    """
+    Serializes a JSON object, with orjson if it is installed. The standard library is
+    used instead for objects that orjson would reject or write differently: values that
+    are not plain JSON types, and non-finite floats that it would write as ``null``.
+
+    Arguments:
+      data: The JSON object to serialize
+
+    Returns:
+      The UTF-8 encoded JSON document
+
+    """
+    if orjson is not None and not any(
+        isinstance(value, float) and not math.isfinite(value) for value in data.values()
+    ):
+        try:
+            return orjson.dumps(data)
+        except TypeError:
+            pass
+    return json.dumps(data, separators=(",", ":")).encode()
+
+
+def loads_json(contents: bytes) -> Any:
+    """
+    Parses a JSON document, with orjson if it is installed.
+
+    Arguments:
+      contents: The JSON document
+
+    Returns:
+      The parsed document
+
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(contents)
+        except orjson.JSONDecodeError:
+            # The standard library also accepts the NaN and Infinity it writes itself
+            pass
+    return json.loads(contents)
+
+
+def update_json(json_path: str, data: Dict[str, Any]) -> None:
+    """
+    Merges ``data`` into the JSON object stored in ``json_path``, creating the file if it
+    is missing or empty. The merged object is written to a temporary file that then replaces
+    ``json_path``, so a crash mid-write never leaves a truncated file behind. Each workflow
+    task writes its own per-submission file, so the read-modify-write isn't locked.
+
+    Arguments:
+      json_path: The path to the JSON file
+      data: The keys and values to add to (or update in) the JSON object
+
+    """
+    try:
+        with open(json_path, "rb") as file:
+            contents = file.read()
+    except FileNotFoundError:
+        contents = b""
+    existing_data = loads_json(contents) if contents.strip() else {}
+    existing_data.update(data)
+
+    write_json(json_path, existing_data)
+
+
+@lru_cache(maxsize=1)
+def get_umask() -> int:
+    """
+    Gets the file mode creation mask of the process, which can only be read by setting it.
+
+    Returns:
+      The umask of the process
+
+    """
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+def write_json(json_path: str, data: Dict[str, Any]) -> None:
+    """
+    Writes ``data`` as JSON to a temporary file next to ``json_path`` that then replaces
+    it, so a crash mid-write never leaves a truncated file behind. The file keeps the
+    permissions of the file it replaces, or gets those of a newly created file.
+
+    Arguments:
+      json_path: The path to the JSON file
+      data: The JSON object to write
+
+    """
+    file_descriptor, temp_path = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(json_path)), suffix=".tmp"
+    )
+    try:
+        # mkstemp makes the file private (0600), which os.replace would carry over
+        try:
+            mode = stat.S_IMODE(os.stat(json_path).st_mode)
+        except FileNotFoundError:
+            mode = 0o666 & ~get_umask()
+        os.fchmod(file_descriptor, mode)
+        with os.fdopen(file_descriptor, "wb") as file:
+            file.write(dumps_json(data))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, json_path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def copy_member(source: BinaryIO, target: BinaryIO) -> None:
+    """
+    Copies an extracted archive member into a target file, in ``COPY_BUFFER_SIZE``
+    chunks read into a buffer borrowed from ``COPY_BUFFERS``.
+
+    Arguments:
+      source: The open archive member to copy from
+      target: The file opened in binary mode to copy into
+
+    """
+    try:
+        buffer = COPY_BUFFERS.get_nowait()
+    except queue.Empty:
+        buffer = bytearray(COPY_BUFFER_SIZE)
+    view = memoryview(buffer)
+    try:
+        while True:
+            n = source.readinto(view)
+            if not n:
+                break
+            target.write(view[:n])
+    finally:
+        view.release()
+        COPY_BUFFERS.put(buffer)
+
+
 def rename_file(submission_id: str, input_path: str) -> None:
     """
     Prefixes the name of a file with the given ``submission_id``.
@@ -42,22 +414,10 @@ def rename_file(submission_id: str, input_path: str) -> None:
         input_path: The path of the file to be renamed
 
     """
-    # Extract the directory from the input path
-    dirname = os.path.dirname(input_path)
-
-    # Extract the filename from the input path
-    filename = os.path.basename(input_path)
-
-    # Rename the file based on submission_id
-    new_filename = f"{submission_id}_{filename}"
-
-    # Create the new path for the renamed file
-    new_path = os.path.join(dirname, new_filename)
+    path = pathlib.Path(input_path)
+    new_path = path.with_name(f"{submission_id}_{path.name}")
 
     # Rename the original file
-    os.rename(input_path, new_path)
+    os.replace(path, new_path)
 
-    # Print the path to the renamed file
-    print("File renamed successfully.")
-    print("Original file: ", input_path)
-    print("Renamed file: ", new_path)
+    print(f"Renamed {input_path} to {new_path}")
@@ -13,7 +13,6 @@ https://github.com/Sage-Bionetworks-Challenges/model-to-data-challenge-workflow/
 
 import os
 import sys
-import json
 import time
 from glob import glob
 from typing import (
@@ -25,7 +24,6 @@ from typing import (
 from zipfile import ZipFile
 
 import docker
-import synapseclient
 
 import helpers
 
@@ -40,53 +38,6 @@ class OutputsHandled(NamedTuple):
     log_text: str
 
 
-def get_entity_type(syn: synapseclient.Synapse, submission_id: str) -> str:
-    """
-    Retrieves entity type from submission
-
-    Arguments:
-        syn: Synapse connection
-        submission_id: Submission ID to be queried
-
-    Returns:
-        Entity type of the submission
-
-    """
-    file_handle = syn.getSubmission(submission_id)
-    entity_bundle = json.loads(file_handle.get("entityBundleJSON"))
-    entity_type = entity_bundle.get("entityType")
-
-    return entity_type
-
-
-def get_submission_image(syn: synapseclient.Synapse, submission_id: str) -> str:
-    """
-    Retrieves Docker Image ID from submission
-
-    Arguments:
-        submission_id: Submission ID to be queried
-
-    Returns:
-        image_id: Docker image identifier in the format: '<image_name>@<sha_code>'
-
-    Raises:
-        ValueError: If submission has no associated Docker image
-
-    """
-    submission = syn.getSubmission(submission_id)
-    docker_repository = submission.get("dockerRepositoryName", None)
-    docker_digest = submission.get("dockerDigest", None)
-    if not docker_digest or not docker_repository:
-
-        entity_type = get_entity_type(syn, submission_id)
-        input_error = f"InputError: Submission {submission_id} should be a Docker image, not {entity_type}"
-        print(input_error)
-        return input_error
-    image_id = f"{docker_repository}@{docker_digest}"
-
-    return image_id
-
-
 def make_invalid_output(file_name: str, log_file_path: str, file_content: str) -> str:
     """
     Creates an invalid new output file, given the original file name, log file path, and file content, and returns the path of the new file.
@@ -133,7 +84,7 @@ def check_output_file_size(
     file = file_list[0]
 
     # Check output files that are zipped into a single file
-    if ".zip" in os.path.basename(file):
+    if file.endswith(".zip"):
         with ZipFile(file, "r") as zipfile:
             incorrect_size = any(
                 zip_info.file_size == 0
@@ -285,17 +236,11 @@ def mount_volumes() -> dict:
     output_dir = os.path.join(os.getcwd(), "output")
     input_dir = os.path.join(os.getcwd(), "input")
 
-    mounted_volumes = {
+    return {
         output_dir: {"bind": "/output", "mode": "rw"},
         input_dir: {"bind": "/input", "mode": "ro"},
     }
 
-    volumes = {}
-    for vol in mounted_volumes.keys():
-        volumes[vol] = mounted_volumes[vol]
-
-    return volumes
-
 
 def validate_submission(
     docker_image: str, output_path: str, output_file_name: str
@@ -410,6 +355,30 @@ def monitor_container(
         return monitor_container(container, timeout, poll_interval, elapsed_time)
 
 
+def read_container_logs(
+    container: docker.models.containers.Container, max_bytes: int
+) -> str:
+    """
+    Reads the logs (stdout and stderr) of a Docker container as a stream, only keeping their last
+    ``max_bytes`` bytes, so that long logs are never held in memory in full.
+
+    Arguments:
+        container: The Docker container to read the logs of.
+        max_bytes: The maximum number of bytes to keep from the end of the logs.
+
+    Returns:
+        The end of the container logs. Characters cut in half at the start are dropped.
+    """
+    log_tail = bytearray()
+    for chunk in container.logs(stdout=True, stderr=True, stream=True):
+        log_tail += chunk
+        # Trim in bulk rather than on every chunk
+        if len(log_tail) > 2 * max_bytes:
+            del log_tail[:-max_bytes]
+
+    return bytes(log_tail[-max_bytes:]).decode("utf-8", "ignore")
+
+
 def run_docker(
     submission_id: str,
     container_timeout: Union[int, float],
@@ -450,7 +419,7 @@ def run_docker(
     client = docker.from_env()
 
     # Log into Synapse
-    syn = synapseclient.login(silent=True)
+    syn = helpers.get_syn()
 
     # Login to the Docker registry using SYNAPSE_AUTH_TOKEN
     client.login(
@@ -463,7 +432,7 @@ def run_docker(
     volumes = mount_volumes()
 
     # Get the Docker image ID from the submission
-    docker_image = get_submission_image(syn, submission_id)
+    docker_image = helpers.get_submission_image(syn, submission_id)
 
     # Get the output directory based on the mounted volumes dictionary used to run the container
     output_path = next(
@@ -492,8 +461,9 @@ def run_docker(
             container, timeout=container_timeout, poll_interval=poll_interval
         )
 
-        # Capture and save the container logs (stdout and stderr)
-        log_text = container.logs(stdout=True, stderr=True).decode("utf-8")
+        # Capture and save the container logs (stdout and stderr). Only their end can make it into
+        # the log file, so keep enough bytes for ``log_max_size`` kilobytes of (up to 4-byte) UTF-8 characters
+        log_text = read_container_logs(container, max_bytes=4 * log_max_size * 1000)
 
         # Update the log text with the timeout error message, if it exists
         log_text = log_text + "\n\n" + timeout_msg
@@ -7,6 +7,49 @@ import synapseclient
 
 import helpers
 
+# Number of e-mails sent concurrently, kept low to stay clear of Synapse's rate limits
+SEND_MAX_THREADS = 8
+# Number of times an e-mail is tried, within the same task, before giving up on it
+SEND_ATTEMPTS = 3
+
+# Submission annotations that are not scores
+# TODO: A more elegant way to only get the score annotations?
+NON_SCORE_ANNOTATIONS = frozenset(
+    {
+        "score_errors",
+        "score_status",
+        "validation_errors",
+        "validation_status",
+        "predictions_id",
+        "docker_logs_id",
+    }
+)
+
+# E-mail bodies for each (submission status, email_with_score) pair, filled in with ``str.format``
+EMAIL_TEMPLATES = {
+    ("VALIDATED", "yes"): (
+        "Submission {submission_id} has been evaluated with the following scores:\n\n"
+        "{scores}"
+        "\n\nView all your scores here: https://www.synapse.org/#!Synapse:{view_id}/tables/"
+    ),
+    ("VALIDATED", "no"): (
+        "Submission {submission_id} has been evaluated. Your score will be available after "
+        "Challenge submissions are closed. Thank you for participating!"
+    ),
+    ("INVALID", "yes"): (
+        "Evaluation failed for Submission {submission_id}.\n"
+        "Reason: '{reason}'.\n\n"
+        "View your submissions here: https://www.synapse.org/#!Synapse:{view_id}/tables/, "
+        "and contact the organizers for more information."
+    ),
+    ("INVALID", "no"): (
+        "Evaluation failed for Submission {submission_id}.\n"
+        "Reason: '{reason}'.\n"
+        "Please contact the organizers for more information."
+    ),
+}
+
+
 class SubmissionAnnotations(NamedTuple):
     status: str
     score: List[int]
@@ -14,12 +57,7 @@ class SubmissionAnnotations(NamedTuple):
 
 
 def get_score_dict(score):
-    strings = [""]
-    for key in score.keys():
-        string = f"{key} : {score[key][0]}" + "\n"
-        strings.append(string)
-
-    return strings
+    return (f"{key} : {value[0]}" for key, value in score.items())
 
 
 def email_template(
@@ -46,45 +84,24 @@ def email_template(
       A string for that represents the body of the e-mail to be sent out to submitting team or individual.
 
     """
-    templates = {
-        (
-            "VALIDATED",
-            "yes",
-        ): f"Submission {submission_id} has been evaluated with the following scores:\n"
-        + "\n".join(get_score_dict(score))
-        + f"\nView all your scores here: https://www.synapse.org/#!Synapse:{view_id}/tables/",
-        (
-            "VALIDATED",
-            "no",
-        ): f"Submission {submission_id} has been evaluated. Your score will be available after Challenge submissions are closed. Thank you for participating!",
-        (
-            "INVALID",
-            "yes",
-        ): f"Evaluation failed for Submission {submission_id}."
-        + "\n"
-        + f"Reason: '{reason}'."
-        + "\n\n"
-        + f"View your submissions here: https://www.synapse.org/#!Synapse:{view_id}/tables/, and contact the organizers for more information.",
-        (
-            "INVALID",
-            "no",
-        ): f"Evaluation failed for Submission {submission_id}."
-        + "\n"
-        + f"Reason: '{reason}'."
-        + "\n"
-        + "Please contact the organizers for more information.",
-    }
+    template = EMAIL_TEMPLATES.get((status, email_with_score))
 
-    body = templates.get((status, email_with_score))
-
-    # If there is a typo in ``email_with_score``, ``body`` will be None;
+    # If there is a typo in ``email_with_score``, ``template`` will be None;
     # Raise an error if so, to avoid sending empty e-mails...
-    if body is None:
+    if template is None:
         raise ValueError(
             f"Incorrect status and/or email_with_score arguments. Got status: {status}, email_with_score: {email_with_score}."
         )
 
-    return body
+    # Only list the scores for the templates that show them
+    scores = "\n".join(get_score_dict(score)) if "{scores}" in template else ""
+
+    return template.format(
+        submission_id=submission_id,
+        view_id=view_id,
+        scores=scores,
+        reason=reason,
+    )
 
 
 def get_annotations(syn: synapseclient.Synapse, submission_id: str) -> NamedTuple:
@@ -105,19 +122,12 @@ def get_annotations(syn: synapseclient.Synapse, submission_id: str) -> NamedTupl
     submission_status = submission_annotations.get("validation_status")[0]
     error_reason = submission_annotations.get("validation_errors")[0]
 
-    # TODO: A more elegant way to only get the score annotations?
-    non_score_annotations = [
-        "score_errors",
-        "score_status",
-        "validation_errors",
-        "validation_status",
-        "predictions_id",
-        "docker_logs_id"
-    ]
+    # Filtering the keys in order, rather than taking a set difference of them,
+    # keeps the scores listed in the e-mail in the order they were annotated
     submission_scores = {
-        key: submission_annotations.get(key)
-        for key in submission_annotations.keys()
-        if key not in non_score_annotations
+        key: value
+        for key, value in submission_annotations.items()
+        if key not in NON_SCORE_ANNOTATIONS
     }
     return SubmissionAnnotations(
         status=submission_status, score=submission_scores, reason=error_reason
@@ -135,7 +145,7 @@ def send_email(view_id: str, submission_id: str, email_with_score: str):
 
     """
     # Initiate connection to Synapse
-    syn = synapseclient.login()
+    syn = helpers.get_syn()
 
     # Get MODEL_TO_DATA annotations for the given submission
     submission_annotations = get_annotations(syn, submission_id)
@@ -162,12 +172,41 @@ def send_email(view_id: str, submission_id: str, email_with_score: str):
     syn.sendMessage(userIds=ids_to_notify, messageSubject=subject, messageBody=body)
 
 
+def send_emails(
+    view_id: str, submission_ids: List[str], email_with_score: str
+) -> List[str]:
+    """
+    Sends the e-mails on the status of several submissions from a single process,
+    so they all share one logged in Synapse client instead of each logging in.
+    The e-mails are sent concurrently, as sending them is mostly waiting on Synapse.
+
+    Arguments:
+      view_id: The view Id of the Submission View on Synapse
+      submission_ids: The IDs of the submissions to send e-mails for
+
+    Returns:
+      The IDs of the submissions whose e-mails could not be sent
+
+    """
+    return helpers.for_each_submission(
+        lambda submission_id: send_email(view_id, submission_id, email_with_score),
+        submission_ids,
+        SEND_MAX_THREADS,
+        attempts=SEND_ATTEMPTS,
+    )
+
+
 if __name__ == "__main__":
     view_id = sys.argv[1]
-    submission_id = sys.argv[2]
+    # One submission ID, or several separated by commas
+    submission_ids = sys.argv[2].split(",")
     email_with_score = sys.argv[3]
     # This is here despite not currently being used.
     # This is so that we can still use one `send_email.nf` process while supporting both `BEFORE` and `AFTER` notifications
     notification_type = sys.argv[4]
 
-    send_email(view_id, submission_id, email_with_score)
+    # The e-mails that fail are retried on their own, and a batch that still has failures
+    # doesn't fail the task: retrying the task would send the whole batch's e-mails again
+    failed_ids = send_emails(view_id, submission_ids, email_with_score)
+    if failed_ids:
+        print(f"Failed to send the e-mails for submission(s): {','.join(failed_ids)}")
@@ -1,52 +1,142 @@
 #!/usr/bin/env python3
 
+import argparse
+import sys
 import json
 import os
-import sys
-from typing import Union, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Union
+
 import synapseclient
+from synapseclient.core.utils import id_of
+
 import helpers
 
+# Number of threads each upload may use to send the parts of a file in parallel
+UPLOAD_MAX_THREADS = min(8, os.cpu_count() or 1)
 
-def store_file(
+
+def get_args() -> argparse.Namespace:
+    """Set up command-line interface and get arguments."""
+    parser = argparse.ArgumentParser(
+        description="Upload the Challenge output files of one or more submissions."
+    )
+    parser.add_argument("project_name", type=str, help="The name of the Project")
+    parser.add_argument(
+        "submission_id",
+        type=str,
+        nargs="?",
+        help="The ID of the submission. Not needed if --manifest is given.",
+    )
+    parser.add_argument(
+        "folder_files",
+        type=str,
+        nargs="*",
+        help="Pairs of subfolder names and the file to upload into each: <folder_name> <file_name> [...]",
+    )
+    parser.add_argument(
+        "--manifest",
+        type=str,
+        help="A TSV file with ''submission_id'', ''folder_name'' and ''input_file'' columns, "
+        "to upload the files of many submissions at once",
+    )
+    args = parser.parse_args()
+    if args.manifest:
+        if args.submission_id or args.folder_files:
+            parser.error("Files must not be given on the command line if --manifest is given")
+    elif not args.submission_id or not args.folder_files or len(args.folder_files) % 2:
+        parser.error(
+            "Expected a submission_id and one or more pairs of subfolder names and file names to upload"
+        )
+
+    return args
+
+
+def get_subfolder_id(
     syn: synapseclient.Synapse,
     folder_name: str,
-    input_file: str,
     submitter_id: str,
     parent_id: Union[str, synapseclient.Entity],
-) -> synapseclient.File:
+) -> str:
     """
-    Store a given input file in its correct location on Synapse, and returns the Synapse file entity.
+    Looks up the Synapse ID of the given subfolder in the submitter's folder.
 
     Arguments:
         syn: A Synapse Python client instance
-        folder_name: The name of the subfolder that will house the input_file
-        input_file: The name of the file to be uploaded into the subfolder
+        folder_name: The name of the subfolder
         submitter_id: The ID of the submitter
         parent_id: The ID of the parent folder
 
     Returns:
-        The Synapse File entity that was created
+        The Synapse ID of the subfolder
 
     Raises:
         ValueError: If the subfolder does not exist
 
     """
 
-    submitter_folder = syn.findEntityId(submitter_id, parent_id)
+    # The parent holds a folder for every submitter, so the submitter's folder is looked up
+    # by name, while its few subfolders are all listed at once
+    submitter_folder = helpers.find_entity_id(syn, str(submitter_id), id_of(parent_id))
 
-    subfolder = syn.findEntityId(folder_name, submitter_folder)
+    subfolder = (
+        helpers.get_child_folders(syn, submitter_folder).get(folder_name)
+        if submitter_folder
+        else None
+    )
 
     if not subfolder:
         raise ValueError(
             f"Could not find '{folder_name}' subfolder on Synapse for submitter ID: {submitter_id}"
         )
 
-    file_entity = syn.store(synapseclient.File(input_file, parentId=subfolder))
+    return subfolder
+
+
+def store_file(
+    syn: synapseclient.Synapse,
+    input_file: str,
+    subfolder_id: str,
+) -> synapseclient.File:
+    """
+    Store a given input file in its subfolder on Synapse, and returns the Synapse file entity.
+
+    Arguments:
+        syn: A Synapse Python client instance
+        input_file: The name of the file to be uploaded into the subfolder
+        subfolder_id: The ID of the subfolder that will house the input_file
+
+    Returns:
+        The Synapse File entity that was created
+
+    """
+
+    # Re-uploading an unchanged file does not need to create a new version of it
+    file_entity = syn.store(
+        synapseclient.File(input_file, parentId=subfolder_id), forceVersion=False
+    )
 
     return file_entity
 
 
+def get_file_size(filepath: Optional[str]) -> int:
+    """
+    Return the size of a file in bytes using a single ``stat`` call.
+
+    Arguments:
+        filepath: The path to the file.
+
+    Returns:
+        int: The size of the file. If no path is given or the file cannot be accessed, 0 is returned.
+    """
+    if not filepath:
+        return 0
+    try:
+        return os.stat(filepath).st_size
+    except OSError:
+        return 0
+
+
 def load_data(filepath: str) -> Dict[str, Any]:
     """
     Load and return data from a JSON file if it exists. If it does not, return an empty dictionary.
@@ -67,13 +157,13 @@ def load_data(filepath: str) -> Dict[str, Any]:
 def update_folders(
     project_name: str,
     submission_id: str,
-    folder_name: str,
-    input_file: str,
+    input_files: Dict[str, str],
     root_folder_name: str = "Logs",
 ) -> None:
     """
-    This function can either create or re-create a root folder and set of subfolders to
-    store Challenge output files for Challenge participants and organizers.
+    This function uploads Challenge output files into the subfolders created for the
+    submitter by ``create_folders.py``, and records the Synapse IDs of the uploaded files
+    in an annotation file for the submission.
 
     The current Challenge Folder structure is as follows:
 
@@ -85,70 +175,108 @@ def update_folders(
     Arguments:
         project_name: The name of the Project
         submission_id: The Submission ID of the submission being processed
-        folder_name: The name of the subfolder that will house the ``input_file``
-        input_file: The name of the file to be uploaded into the subfolder
+        input_files: The names of the files to be uploaded, keyed by the name of the subfolder
+                     that will house each file
         root_folder_name: The name of the root folder housing all the subfolders and File entities
 
     Raises:
-        ValueError: If the root folder does not exist, or the file attempted to be uploaded is empty.
+        ValueError: If the root folder does not exist, or a file attempted to be uploaded is empty.
 
     """
-    # Log into the client
-    syn = synapseclient.login(silent=True)
-
-    # Retrieving Synapse IDs that will be necessary later
-    project_id = syn.findEntityId(name=project_name)
-    submitter_id = helpers.get_participant_id(syn, submission_id)[0]
-
-    # Get the Synapse ID of the root Folder housing all the subfolders and File entities
-    root_folder_id = syn.findEntityId(name=root_folder_name, parent=project_id)
-    if not root_folder_id:
-        raise ValueError(
-            f"Could not find '{root_folder_name}' root folder on Synapse for project ID: {project_id}. Exiting."
-        )
-
-    # ``input_file`` must not be None or empty to proceed
-    # with the upload to Synapse
-    if input_file and os.path.getsize(input_file) > 0:
-        print(f"Storing {input_file} for submission {submission_id}...")
-        file_entity = store_file(
-            syn,
-            folder_name=folder_name,
-            input_file=input_file,
-            submitter_id=submitter_id,
-            parent_id=root_folder_id,
-        )
-
-    else:
-        raise ValueError(
-            f"Non-empty prediction and log files must be provided to update folders for submission {submission_id}. Exiting."
+    # Each ``input_file`` must not be None, missing or empty to proceed
+    # with the upload to Synapse. This is checked before logging in to fail fast.
+    for input_file in input_files.values():
+        if get_file_size(input_file) == 0:
+            raise ValueError(
+                f"Non-empty prediction and log files must be provided to update folders for submission {submission_id}. Exiting."
+            )
+
+    # Log into the client, and let it upload the parts of large files in parallel
+    syn = helpers.get_syn()
+    syn.max_threads = UPLOAD_MAX_THREADS
+
+    # Use the subfolder IDs recorded by ``create_folders.py`` if they were handed over,
+    # otherwise look up the subfolders on Synapse
+    folder_ids_filename = helpers.FOLDER_IDS_FILENAME.format(submission_id=submission_id)
+    folder_ids = load_data(folder_ids_filename)
+    if not all(folder_name in folder_ids for folder_name in input_files):
+        # Retrieving Synapse IDs that will be necessary later
+        project_id = helpers.find_entity_id(syn, name=project_name)
+        submitter_id = helpers.get_participant_id(syn, submission_id)[0]
+
+        # Get the Synapse ID of the root Folder housing all the subfolders and File entities
+        root_folder_id = helpers.find_entity_id(
+            syn, name=root_folder_name, parent=project_id
         )
-
-    # Make a record of the file entity's Synapse ID so it can be stored as an annotation for the given submission
-    file_synid = file_entity.id
-    output_annotation = {f"{folder_name}_id": file_synid}
+        if not root_folder_id:
+            raise ValueError(
+                f"Could not find '{root_folder_name}' root folder on Synapse for project ID: {project_id}. Exiting."
+            )
+
+        folder_ids = {
+            folder_name: get_subfolder_id(
+                syn,
+                folder_name=folder_name,
+                submitter_id=submitter_id,
+                parent_id=root_folder_id,
+            )
+            for folder_name in input_files
+        }
+
+    # The files go into separate subfolders independently of each other, so they are uploaded concurrently
+    with ThreadPoolExecutor(max_workers=len(input_files)) as executor:
+        futures = {}
+        for folder_name, input_file in input_files.items():
+            print(f"Storing {input_file} for submission {submission_id}...")
+            futures[folder_name] = executor.submit(
+                store_file,
+                syn,
+                input_file=input_file,
+                subfolder_id=folder_ids[folder_name],
+            )
+        file_entities = {
+            folder_name: future.result() for folder_name, future in futures.items()
+        }
+
+    # Make a record of the file entities' Synapse IDs so they can be stored as annotations for the given submission
+    output_annotation = {}
     output_annotation_filename = f"output_annotation_{submission_id}.json"
     print(f"New annotation will be added for submission: {submission_id}")
-    print(f"Synapse ID for {folder_name} is {file_synid}")
-
-    # Read existing data if file exists, otherwise `existing_annotation` is an empty dictionary
-    existing_annotation = load_data(output_annotation_filename)
+    for folder_name, file_entity in file_entities.items():
+        output_annotation[f"{folder_name}_id"] = file_entity.id
+        print(f"Synapse ID for {folder_name} is {file_entity.id}")
 
-    existing_annotation.update(output_annotation)
-
-    with open(output_annotation_filename, "w") as file:
-        file.write(json.dumps(existing_annotation))
+    # Merge into the existing annotations, if any, replacing the file atomically
+    helpers.update_json(output_annotation_filename, output_annotation)
 
 
 if __name__ == "__main__":
-    project_name = sys.argv[1]
-    submission_id = sys.argv[2]
-    folder_name = sys.argv[3]
-    file_name = sys.argv[4]
-
-    update_folders(
-        project_name=project_name,
-        submission_id=submission_id,
-        folder_name=folder_name,
-        input_file=file_name,
+    args = get_args()
+
+    # Group the files to upload by submission, keeping the order they were given in
+    submission_files = {}
+    if args.manifest:
+        for row in helpers.read_manifest(
+            args.manifest, ["submission_id", "folder_name", "input_file"]
+        ):
+            submission_files.setdefault(row["submission_id"], {})[
+                row["folder_name"]
+            ] = row["input_file"]
+    else:
+        submission_files[args.submission_id] = dict(
+            zip(args.folder_files[::2], args.folder_files[1::2])
+        )
+
+    # Upload the files, reusing the same Synapse session for every submission. A failure
+    # for one submission doesn't stop the others from being processed.
+    failed_ids = helpers.for_each_submission(
+        lambda submission_id: update_folders(
+            project_name=args.project_name,
+            submission_id=submission_id,
+            input_files=submission_files[submission_id],
+        ),
+        list(submission_files),
+        max_workers=1,
     )
+    if failed_ids:
+        sys.exit(f"Failed to upload the files for submission(s): {','.join(failed_ids)}")
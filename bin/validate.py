@@ -1,11 +1,12 @@
 #!/usr/bin/env python3
 
 import glob
-import json
 import os
 import sys
 import zipfile
 
+import helpers
+
 if __name__ == "__main__":
     predictions_path = sys.argv[1]
     goldstandard_path = sys.argv[2]
@@ -19,17 +20,28 @@ if __name__ == "__main__":
     else:
         # Unzipping the predictions and extracting the files in
         # the current working directory
-        if ".zip" in os.path.basename(predictions_path):
+        if zipfile.is_zipfile(predictions_path):
+            predictions_files = []
             with zipfile.ZipFile(predictions_path, "r") as zip_ref:
                 for zip_info in zip_ref.infolist():
-                    if zip_info.is_dir():
+                    # Only the CSV files are validated, so the other files are not extracted
+                    if zip_info.is_dir() or not zip_info.filename.endswith(".csv"):
                         continue
                     # Extract the file ignoring directory structure it was zipped in
-                    zip_info.filename = os.path.basename(zip_info.filename)
-                    zip_ref.extract(zip_info, os.getcwd())
-
-        # Grabbing the extracted predictions files
-        predictions_files = glob.glob(os.path.join(os.getcwd(), "*.csv"))
+                    file_path = os.path.join(
+                        os.getcwd(), os.path.basename(zip_info.filename)
+                    )
+                    with zip_ref.open(zip_info) as source, open(file_path, "wb") as target:
+                        helpers.copy_member(source, target)
+                    predictions_files.append(file_path)
+        else:
+            # Grabbing the predictions files
+            with os.scandir(os.getcwd()) as entries:
+                predictions_files = [
+                    entry.path
+                    for entry in entries
+                    if entry.is_file() and entry.name.endswith(".csv")
+                ]
 
         # Grabbing the gold standard file
         gs_file = glob.glob(os.path.join(goldstandard_path, "*"))[0]
@@ -38,12 +50,13 @@ if __name__ == "__main__":
         with open(gs_file, "r") as sub_file:
             message = sub_file.read()
 
-        # Validating file contents
-        for file in predictions_files:
-            with open(file, "r") as sub_file:
-                message = sub_file.read()
+        # Validating file contents, which only needs the size of each file
+        if not predictions_files:
+            prediction_status = "INVALID"
+            invalid_reasons.append("No predictions file found")
+        else:
             prediction_status = "VALIDATED"
-            if message is None:
+            if any(os.path.getsize(file) == 0 for file in predictions_files):
                 prediction_status = "INVALID"
                 invalid_reasons.append("At least one predictions file is empty")
     result = {
@@ -51,6 +64,5 @@ if __name__ == "__main__":
         "validation_errors": ";".join(invalid_reasons),
     }
 
-    with open("results.json", "w") as o:
-        o.write(json.dumps(result))
+    helpers.write_json("results.json", result)
     print(prediction_status)
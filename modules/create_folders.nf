@@ -15,10 +15,11 @@ process CREATE_FOLDERS {
     val private_folders
 
     output:
-    val "ready"
+    val "ready", emit: ready
+    tuple val(submission_id), path("folder_ids_${submission_id}.json"), emit: folder_ids
 
     script:
     """
-    create_folders.py '${project_name}' '${submission_id}' '${private_folders}'
+    create_folders.py '${project_name}' '${submission_id}' --private-folders '${private_folders}'
     """
 }
@@ -18,6 +18,7 @@ process SCORE_DATA_TO_MODEL {
 
     script:
     """
+    export SCORING_MAX_WORKERS=${task.cpus}
     status=\$(${scoring_script} '${submission_id}' '${status}' '${predictions}' '${staged_path}' '${results}')
     """
 }
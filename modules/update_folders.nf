@@ -5,20 +5,20 @@ process UPDATE_FOLDERS {
     container "sagebionetworks/synapsepythonclient:v4.1.1"
 
     input:
-    val submission_id
+    tuple val(submission_id), path(predictions_file), path(docker_log_file), path(folder_ids)
     val project_name
-    tuple path(predictions_file), path(docker_log_file)
 
     output:
     tuple val(submission_id), path(predictions_file), val("status"), path("output_annotation*.json")
 
     script:
     """
+    folder_files=('docker_logs' '${docker_log_file}')
     if [[ ! \$(basename '${predictions_file}') == *\"INVALID\"* ]];
     then
-        update_folders.py '${project_name}' '${submission_id}' 'predictions' '${predictions_file}'
+        folder_files+=('predictions' '${predictions_file}')
     fi
 
-    update_folders.py '${project_name}' '${submission_id}' 'docker_logs' '${docker_log_file}'
+    update_folders.py '${project_name}' '${submission_id}' "\${folder_files[@]}"
     """
 }
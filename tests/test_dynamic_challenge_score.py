@@ -0,0 +1,79 @@
+import os
+import sys
+import tarfile
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "bin"))
+
+import dynamic_challenge_score  # noqa: E402
+
+
+@pytest.mark.parametrize("shape", [(200, 30), (30, 200)])
+def test_spectral_norm_of_integer_matrix_matches_numpy(shape):
+    rng = np.random.default_rng(0)
+    matrix = rng.integers(-2000, 2000, size=shape).astype(np.int16)
+
+    assert dynamic_challenge_score.spectral_norm(matrix) == pytest.approx(
+        np.linalg.norm(matrix, 2), rel=1e-9
+    )
+
+
+@pytest.mark.parametrize(
+    "array",
+    [
+        np.arange(24, dtype=np.float32).reshape(2, 3, 4),
+        np.asfortranarray(np.arange(12, dtype=">i4").reshape(3, 4)),
+        np.array(3.5),
+        np.empty((0, 5)),
+    ],
+)
+def test_load_tar_npy_matches_np_load(tmp_path, array):
+    npy_path = tmp_path / "prediction.npy"
+    np.save(npy_path, array)
+    tar_path = tmp_path / "predictions.tar"
+    with tarfile.open(tar_path, "w") as tar_f:
+        tar_f.add(npy_path, arcname="prediction.npy")
+
+    with tarfile.open(tar_path, "r") as tar_f:
+        loaded = dynamic_challenge_score.load_tar_npy(
+            tar_f, tar_f.getmember("prediction.npy")
+        )
+
+    expected = np.load(npy_path)
+    assert loaded.dtype == expected.dtype
+    assert loaded.flags.f_contiguous == expected.flags.f_contiguous
+    np.testing.assert_array_equal(loaded, expected)
+
+
+def numpy_integer_histogram(values, lo, hi, monkeypatch):
+    with monkeypatch.context() as patch:
+        patch.setattr(dynamic_challenge_score, "njit", None)
+        return dynamic_challenge_score.integer_histogram(values, lo, hi)
+
+
+@pytest.mark.parametrize("lo, hi", dynamic_challenge_score.ODE_HISTOGRAM_RANGES)
+def test_numba_integer_histogram_matches_numpy(tmp_path, monkeypatch, lo, hi):
+    pytest.importorskip("numba")
+
+    rng = np.random.default_rng(0)
+    values = rng.uniform(lo - 5, hi + 5, size=(3, 10_000))
+    # Include the closed upper edge, the bin edges and values that are never counted
+    values[:, :4] = [hi, lo, np.nan, np.inf]
+    values[:, 4:8] = np.arange(lo, lo + 4)
+
+    memmap = np.memmap(tmp_path / "values.dat", dtype=values.dtype, mode="w+", shape=values.shape)
+    memmap[:] = values
+    memmap.flush()
+    memmap = np.memmap(tmp_path / "values.dat", dtype=values.dtype, mode="r", shape=values.shape)
+
+    # Rows of the ODE data are passed in, and the columns are strided views
+    for array in (values[1, :], memmap[1, :], values[:, 1], memmap[:, 5]):
+        expected = numpy_integer_histogram(array, lo, hi, monkeypatch)
+        np.testing.assert_array_equal(
+            dynamic_challenge_score.integer_histogram(array, lo, hi), expected
+        )
+        np.testing.assert_array_equal(
+            expected[: hi - lo], np.histogram(array, bins=np.arange(lo, hi + 1))[0]
+        )
@@ -19,6 +19,8 @@ assert params.email_with_score in ["yes", "no"], "Invalid value for ``email_with
 params.send_email = true
 // set email script
 params.email_script = "send_email.py"
+// Number of submissions whose "BEFORE" e-mails are sent together by one process
+params.email_batch_size = 50
 
 // import modules
 include { CREATE_SUBMISSION_CHANNEL } from '../subworkflows/create_submission_channel.nf'
@@ -37,7 +39,9 @@ include { SEND_EMAIL as SEND_EMAIL_AFTER } from '../modules/send_email.nf'
 workflow DATA_TO_MODEL {
     submission_ch = CREATE_SUBMISSION_CHANNEL()
     if (params.send_email) {
-        SEND_EMAIL_BEFORE(params.email_script, params.view_id, submission_ch, "BEFORE", params.email_with_score, "ready")
+        // Send the "BEFORE" e-mails in batches of comma-separated submission IDs, rather than one process per submission
+        email_before_ch = submission_ch.collate(params.email_batch_size).map { it.join(",") }
+        SEND_EMAIL_BEFORE(params.email_script, params.view_id, email_before_ch, "BEFORE", params.email_with_score, "ready")
     }
     SYNAPSE_STAGE(params.testing_data, "testing_data")
     UPDATE_SUBMISSION_STATUS_BEFORE_EVALUATION(submission_ch, "EVALUATION_IN_PROGRESS")
@@ -68,13 +68,14 @@ workflow MODEL_TO_DATA {
     UPDATE_SUBMISSION_STATUS_BEFORE_RUN(submission_ch, "EVALUATION_IN_PROGRESS")
 
     // Phase 2: Running the Docker submission (runs after Phase 1 data staging)
-    run_docker_outputs = RUN_DOCKER(submission_ch, params.container_timeout, params.poll_interval, SYNAPSE_STAGE_DATA.output, params.cpus, params.memory, params.log_max_size, CREATE_FOLDERS.output, UPDATE_SUBMISSION_STATUS_BEFORE_RUN.output)
+    run_docker_outputs = RUN_DOCKER(submission_ch, params.container_timeout, params.poll_interval, SYNAPSE_STAGE_DATA.output, params.cpus, params.memory, params.log_max_size, CREATE_FOLDERS.out.ready, UPDATE_SUBMISSION_STATUS_BEFORE_RUN.output)
     //// Explicit output handling
     run_docker_submission = run_docker_outputs.map { submission_id, predictions, logs -> submission_id }
-    run_docker_files = run_docker_outputs.map { submission_id, predictions, logs -> tuple(predictions, logs) }
+    //// Pairing the outputs with the IDs of the submission's output folders, so they don't have to be looked up again
+    update_folders_inputs = run_docker_outputs.join(CREATE_FOLDERS.out.folder_ids)
     //// Updating the status, annotations, and output folders
     UPDATE_SUBMISSION_STATUS_AFTER_RUN(run_docker_submission, "ACCEPTED")
-    UPDATE_FOLDERS(run_docker_submission, params.project_name, run_docker_files)
+    UPDATE_FOLDERS(update_folders_inputs, params.project_name)
     ANNOTATE_SUBMISSION_AFTER_UPDATE_FOLDERS(UPDATE_FOLDERS.output)
 
     // Phase 3: Validation of Docker submission results